@@ -188,9 +188,9 @@ start_llm_router() {
     # Start LLM Router with uvicorn and extra arguments
     if [ -n "$extra_args" ]; then
         echo "📋 Extra arguments: $extra_args"
-        exec venv/bin/python -m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086} $extra_args
+        exec venv/bin/python -m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086} --workers ${LLM_ROUTER_WORKERS:-1} $extra_args
     else
-        exec venv/bin/python -m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086}
+        exec venv/bin/python -m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086} --workers ${LLM_ROUTER_WORKERS:-1}
     fi
 }
 
@@ -229,7 +229,7 @@ module.exports = {
     {
       name: 'llm-router',
       script: './venv/bin/python',
-      args: '-m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086}',
+      args: '-m uvicorn src.open_llm_router.llm_router:app --host ${LLM_ROUTER_HOST:-localhost} --port ${LLM_ROUTER_PORT:-8086} --workers ${LLM_ROUTER_WORKERS:-1}',
       env: {
         OPENAI_API_KEY: '${OPENAI_API_KEY:-}',
         GROK_API_KEY: '${GROK_API_KEY:-}',
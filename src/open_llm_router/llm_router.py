@@ -1,8 +1,12 @@
 from fastapi import FastAPI, Request, Header, HTTPException
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import Response, StreamingResponse
+import asyncio
+import hashlib
+import os
+import orjson
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 # Load environment variables from .env file
 try:
@@ -18,11 +22,33 @@ except ImportError:
 from .utils.logger import proxy_logger
 from .utils.config import backend_config
 from .utils.model_router import ModelRouter
+from .utils.json_response import OrjsonResponse
+from .utils.response_cache import response_cache
+from .utils.backend_guard import get_backend_guard, reset_backend_guards
+from .utils.http_client import (
+    get_http_client,
+    close_http_client,
+    prewarm_connections,
+)
+from .providers.base import BaseProvider
 from .providers.claude import ClaudeProvider
 from .providers.gemini import GeminiProvider
 from .providers.openai import OpenAIProvider
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create (and pre-warm) the shared upstream HTTP client; close it on shutdown"""
+    app.state.http_client = get_http_client()
+    if os.getenv("LLM_PREWARM", "1") != "0":
+        await prewarm_connections(
+            b.get("base_url") for b in BACKENDS_CONFIG.get("backends", {}).values()
+        )
+    yield
+    await close_http_client()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=OrjsonResponse)
 
 # Load backends configuration at startup
 BACKENDS_CONFIG = backend_config.load_backends()
@@ -30,6 +56,19 @@ BACKENDS_CONFIG = backend_config.load_backends()
 # Initialize model router with configuration
 model_router = ModelRouter(BACKENDS_CONFIG)
 
+# Upper bound on entries accepted by the batch endpoint
+BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "100"))
+
+# Provider class per backend name; anything else is OpenAI-compatible (openai, grok, etc.)
+PROVIDER_FACTORIES = {
+    "claude": ClaudeProvider,
+    "gemini": lambda backend: GeminiProvider(backend, BACKENDS_CONFIG),
+}
+
+# Providers hold no per-request state, so one instance per backend is reused
+# until the router hands out a different backend dict (new API key or reload)
+_providers: Dict[str, BaseProvider] = {}
+
 
 # Export functions for backward compatibility with tests
 def choose_backend(model: str):
@@ -42,56 +81,157 @@ def get_backend_for_model(model: str):
     return model_router.get_backend_for_model(model)
 
 
+def get_provider(backend: Dict[str, Any]) -> BaseProvider:
+    """Return the shared provider instance for a resolved backend"""
+    backend_name = backend["backend_name"]
+    provider = _providers.get(backend_name)
+    if provider is None or provider.backend is not backend:
+        provider = PROVIDER_FACTORIES.get(backend_name, OpenAIProvider)(backend)
+        _providers[backend_name] = provider
+    return provider
+
+
+async def dispatch_chat_completion(body: Dict[str, Any], raw_body: bytes):
+    """Route one parsed chat completion request to its backend provider"""
+    model = body.get("model", "gpt-3.5-turbo")
+    stream = body.get("stream", False)
+
+    proxy_logger.info("Proxying request for model: %s, stream: %s", model, stream)
+
+    # Validate required fields and the types the router itself relies on
+    messages = body.get("messages")
+    if not messages:
+        raise HTTPException(status_code=400, detail="Missing required field: messages")
+    if not isinstance(messages, list):
+        raise HTTPException(status_code=400, detail="Field 'messages' must be a list")
+    if not isinstance(model, str):
+        raise HTTPException(status_code=400, detail="Field 'model' must be a string")
+
+    # Choose appropriate backend using the model router
+    backend = model_router.choose_backend(model)
+
+    # Identical deterministic requests are answered from the short-lived cache,
+    # or wait for a matching request that is already in flight
+    cache_key = stream_key = None
+    if response_cache.enabled and response_cache.is_cacheable(body):
+        cache_key = response_cache.make_key(model, raw_body)
+        cached_response = await response_cache.get_or_wait(cache_key)
+        if cached_response is not None:
+            return cached_response
+    elif response_cache.enabled and response_cache.is_replayable(body):
+        stream_key = response_cache.make_key(model, raw_body)
+        cached_response = response_cache.replay(stream_key)
+        if cached_response is not None:
+            return cached_response
+
+    try:
+        # Bounded per backend, and rejected up front while its circuit is open;
+        # a streaming response keeps its slot until the body has been sent
+        guard = get_backend_guard(backend)
+        await guard.acquire()
+        try:
+            response = await get_provider(backend).handle_request(
+                body, stream, raw_body
+            )
+        except BaseException as exc:
+            guard.release(exc)
+            raise
+        response = guard.release_after(response)
+    except BaseException:
+        if cache_key is not None:
+            response_cache.release(cache_key)
+        raise
+
+    if cache_key is not None:
+        response = response_cache.capture(cache_key, response)
+    elif stream_key is not None:
+        response = response_cache.broadcast(stream_key, response)
+    return response
+
+
 @app.post("/v1/chat/completions")
 async def proxy_chat_completions(request: Request, authorization: str = Header(None)):
     """Proxy chat completions requests to appropriate backend with full OpenAI compatibility"""
     try:
         # Parse request body
-        body = await request.json()
-        model = body.get("model", "gpt-3.5-turbo")
-        stream = body.get("stream", False)
-
-        proxy_logger.info(f"Proxying request for model: {model}, stream: {stream}")
-
-        # Validate required fields
-        if not body.get("messages"):
+        raw_body = await request.body()
+        body = orjson.loads(raw_body)
+        if not isinstance(body, dict):
             raise HTTPException(
-                status_code=400, detail="Missing required field: messages"
+                status_code=400, detail="Request body must be a JSON object"
             )
-
-        # Choose appropriate backend using the model router
-        backend = model_router.choose_backend(model)
-        backend_name = backend["backend_name"]
-
-        # Create the appropriate provider instance and handle the request
-        if backend_name == "claude":
-            provider = ClaudeProvider(backend)
-            return await provider.handle_request(body, stream)
-        elif backend_name == "gemini":
-            provider = GeminiProvider(backend, BACKENDS_CONFIG)
-            return await provider.handle_request(body, stream)
-        else:
-            # Handle OpenAI-compatible providers (openai, grok, etc.)
-            provider = OpenAIProvider(backend)
-            return await provider.handle_request(body, stream)
+        return await dispatch_chat_completion(body, raw_body)
 
     except HTTPException:
         raise
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON in request body")
     except Exception as e:
         proxy_logger.error(f"Unexpected error in proxy_chat_completions: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def batch_item_body(body: Any) -> bytes:
+    """Run one batch entry to completion and return its JSON body bytes"""
+    try:
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail="Batch entries must be objects")
+        if body.get("stream", False):
+            raise HTTPException(
+                status_code=400, detail="Streaming is not supported in batch requests"
+            )
+        response = await dispatch_chat_completion(body, orjson.dumps(body))
+        if isinstance(response, StreamingResponse):
+            chunks = [
+                chunk if isinstance(chunk, bytes) else chunk.encode()
+                async for chunk in response.body_iterator
+            ]
+            return b"".join(chunks)
+        return bytes(response.body)
+    except HTTPException as e:
+        error = {"message": e.detail, "code": e.status_code}
+    except Exception as e:
+        proxy_logger.error(f"Unexpected error in batch entry: {str(e)}")
+        error = {"message": "Internal server error", "code": 500}
+    return orjson.dumps({"error": error})
+
+
+@app.post("/v1/chat/completions/batch")
+async def proxy_chat_completions_batch(request: Request):
+    """Fan a list of non-streaming chat completion requests out concurrently"""
+    try:
+        bodies = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON in request body")
+    if not isinstance(bodies, list):
+        raise HTTPException(
+            status_code=400, detail="Batch body must be a list of requests"
+        )
+    if len(bodies) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds maximum size of {BATCH_MAX_SIZE} requests",
+        )
+
+    # Upstream calls share the pooled client, so entries run concurrently and
+    # results keep the request order; each item is a completion or an error object
+    results = await asyncio.gather(*(batch_item_body(body) for body in bodies))
+    return Response(
+        content=b"[" + b",".join(results) + b"]", media_type="application/json"
+    )
+
+
+# Immutable, so one instance (headers and Content-Length included) serves every probe
+HEALTH_RESPONSE = Response(content=b'{"status":"ok"}', media_type="application/json")
+
+
 @app.get("/")
-def health():
-    return {"status": "ok"}
+async def health():
+    return HEALTH_RESPONSE
 
 
-@app.get("/v1/models")
-def list_models():
-    """List all available models"""
+def build_models_payload() -> Dict[str, Any]:
+    """Build the /v1/models payload for the current configuration"""
     all_models = []
     backends = BACKENDS_CONFIG.get("backends", {})
 
@@ -108,36 +248,105 @@ def list_models():
                 }
             )
 
-    # Add model aliases
-    model_aliases = BACKENDS_CONFIG.get("model_aliases", {})
-    for alias, target in model_aliases.items():
-        # Find the backend for the target model
-        try:
-            backend = model_router.get_backend_for_model(target)
-            backend_config_dict = backends.get(backend, {})
-            all_models.append(
-                {
-                    "id": alias,
-                    "object": "model",
-                    "created": 1677610602,
-                    "owned_by": backend_config_dict.get("name", backend),
-                    "backend": backend,
-                    "alias_for": target,
-                }
-            )
-        except Exception:
-            continue
+    # Add model aliases; the router already dropped any that cannot be routed
+    for alias, (target, backend) in model_router.resolved_aliases.items():
+        backend_config_dict = backends.get(backend, {})
+        all_models.append(
+            {
+                "id": alias,
+                "object": "model",
+                "created": 1677610602,
+                "owned_by": backend_config_dict.get("name", backend),
+                "backend": backend,
+                "alias_for": target,
+            }
+        )
 
     return {"object": "list", "data": all_models}
 
 
+def build_backends_payload() -> Dict[str, Any]:
+    """Build the /admin/backends payload for the current configuration"""
+    backends = BACKENDS_CONFIG.get("backends", {})
+    backend_list = []
+
+    for backend_name, backend_config_dict in backends.items():
+        backend_list.append(
+            {
+                "name": backend_name,
+                "display_name": backend_config_dict.get("name", backend_name),
+                "base_url": backend_config_dict.get("base_url"),
+                "model_count": len(backend_config_dict.get("models", [])),
+                "models": backend_config_dict.get("models", []),
+                "model_prefixes": backend_config_dict.get("model_prefixes", []),
+            }
+        )
+
+    return {
+        "backends": backend_list,
+        "total_backends": len(backend_list),
+        "model_aliases": BACKENDS_CONFIG.get("model_aliases", {}),
+        "default_models": BACKENDS_CONFIG.get("default_models", {}),
+    }
+
+
+def serialize_cached(payload: Any) -> Tuple[str, Response]:
+    """Serialize a payload once into a reusable response with a strong ETag"""
+    content = orjson.dumps(payload)
+    etag = f'"{hashlib.sha1(content).hexdigest()}"'
+    return etag, Response(
+        content=content, media_type="application/json", headers={"ETag": etag}
+    )
+
+
+def refresh_response_cache():
+    """Rebuild the pre-serialized config-derived responses (startup and reload)"""
+    global MODELS_RESPONSE, BACKENDS_RESPONSE, CONFIG_RESPONSE
+    MODELS_RESPONSE = serialize_cached(build_models_payload())
+    BACKENDS_RESPONSE = serialize_cached(build_backends_payload())
+    CONFIG_RESPONSE = serialize_cached(dict(BACKENDS_CONFIG))
+
+
+def cached_json_response(request: Request, cached: Tuple[str, Response]) -> Response:
+    """Return a cached JSON response, or 304 when the client already holds this ETag"""
+    etag, response = cached
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip() for tag in if_none_match.split(",")}
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers={"ETag": etag})
+    return response
+
+
+# These responses only change on reload, so serve them pre-serialized
+refresh_response_cache()
+
+
+@app.get("/v1/models")
+async def list_models(request: Request):
+    """List all available models"""
+    return cached_json_response(request, MODELS_RESPONSE)
+
+
 @app.post("/admin/reload-backends")
-def reload_backends():
-    """Reload backend configurations from file (admin endpoint)"""
+async def reload_backends():
+    """Reload backend configurations from file (admin endpoint)
+
+    Runs on the event loop rather than the threadpool, so the config, router
+    and cached responses are swapped together between requests.
+    """
     global BACKENDS_CONFIG, model_router
     try:
-        BACKENDS_CONFIG = backend_config.reload()
-        model_router = ModelRouter(BACKENDS_CONFIG)
+        config = backend_config.reload()
+        # An unchanged config file returns the already-loaded mapping; only a
+        # new config needs the router and precomputed responses rebuilt
+        if config is not BACKENDS_CONFIG:
+            BACKENDS_CONFIG = config
+            model_router = ModelRouter(BACKENDS_CONFIG)
+            refresh_response_cache()
+            response_cache.clear()
+            _providers.clear()
+            reset_backend_guards()
         return {
             "status": "success",
             "message": "Backend configuration reloaded",
@@ -152,32 +361,28 @@ def reload_backends():
 
 
 @app.get("/admin/config")
-def get_config():
+async def get_config(request: Request):
     """Get current backend configuration (admin endpoint)"""
-    return BACKENDS_CONFIG
+    return cached_json_response(request, CONFIG_RESPONSE)
 
 
 @app.get("/admin/backends")
-def list_backends():
+async def list_backends(request: Request):
     """List all configured backends (admin endpoint)"""
-    backends = BACKENDS_CONFIG.get("backends", {})
-    backend_list = []
-
-    for backend_name, backend_config_dict in backends.items():
-        backend_list.append(
-            {
-                "name": backend_name,
-                "display_name": backend_config_dict.get("name", backend_name),
-                "base_url": backend_config_dict.get("base_url"),
-                "model_count": len(backend_config_dict.get("models", [])),
-                "models": backend_config_dict.get("models", []),
-                "model_prefixes": backend_config_dict.get("model_prefixes", []),
-            }
-        )
-
-    return {
-        "backends": backend_list,
-        "total_backends": len(backend_list),
-        "model_aliases": BACKENDS_CONFIG.get("model_aliases", {}),
-        "default_models": BACKENDS_CONFIG.get("default_models", {}),
-    }
+    return cached_json_response(request, BACKENDS_RESPONSE)
+
+
+if __name__ == "__main__":
+    # Run with `python -m src.open_llm_router.llm_router`; prefers the C-backed
+    # uvloop event loop and httptools parser shipped with uvicorn[standard]
+    import importlib.util
+    import uvicorn
+
+    uvicorn.run(
+        f"{__spec__.name}:app",
+        host=os.getenv("LLM_ROUTER_HOST", "localhost"),
+        port=int(os.getenv("LLM_ROUTER_PORT", "8086")),
+        workers=int(os.getenv("LLM_ROUTER_WORKERS", "1")),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+    )
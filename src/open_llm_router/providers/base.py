@@ -1,11 +1,60 @@
-import json
+import os
+import re
 import time
-import uuid
-from typing import Dict, Any, AsyncGenerator
+from typing import Dict, Any, AsyncGenerator, Optional, Tuple, Union
 import httpx
+import orjson
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse
 from ..utils.logger import proxy_logger
+from ..utils.http_client import get_http_client
+
+# Random bytes for completion ids, refilled in bulk instead of a uuid4 per id
+_ID_POOL_SIZE = 1 << 16
+_ID_BYTES = 15
+_id_pool = b""
+_id_offset = _ID_POOL_SIZE
+
+
+def new_completion_id() -> str:
+    """Return a random OpenAI-style id ("chatcmpl-" + 29 hex chars)"""
+    global _id_pool, _id_offset
+    if _id_offset + _ID_BYTES > _ID_POOL_SIZE:
+        _id_pool = os.urandom(_ID_POOL_SIZE)
+        _id_offset = 0
+    start = _id_offset
+    _id_offset += _ID_BYTES
+    return "chatcmpl-" + _id_pool[start:_id_offset].hex()[:29]
+
+
+def sse_event(payload: Any) -> bytes:
+    """Frame a payload as one SSE data event, built in a single allocation"""
+    return b"data: %b\n\n" % orjson.dumps(payload)
+
+
+def content_chunk_frame(
+    openai_resp_id: str, created: int, model: str
+) -> Tuple[bytes, bytes]:
+    """Return the SSE bytes before and after the text of a content delta chunk
+
+    The chunk envelope is constant for a stream, so each delta only needs
+    ``prefix + orjson.dumps(text) + suffix``; the result is byte-identical to
+    sse_event() on the equivalent chat.completion.chunk dict.
+    """
+    prefix = (
+        b'data: {"id":%b,"object":"chat.completion.chunk","created":%d,'
+        b'"model":%b,"choices":[{"index":0,"delta":{"content":'
+        % (orjson.dumps(openai_resp_id), created, orjson.dumps(model))
+    )
+    return prefix, b'},"finish_reason":null}]}\n\n'
+
+
+# Top-level keys present on a response that is already OpenAI-shaped
+OPENAI_RESPONSE_KEYS = frozenset({"id", "object", "created", "model", "choices"})
+
+# A "choices" key in a stream event marks it as already OpenAI-shaped. Matching
+# the key (quote, name, quote, colon) cannot hit escaped text inside a string
+OPENAI_CHUNK_RE = re.compile(rb'"choices"\s*:')
 
 
 class BaseProvider:
@@ -13,14 +62,65 @@ class BaseProvider:
         self.backend = backend
         self.backend_name = backend["backend_name"]
 
-    async def handle_request(self, body: Dict[str, Any], stream: bool = False):
-        """Handle request - to be implemented by subclasses"""
+    async def handle_request(
+        self,
+        body: Dict[str, Any],
+        stream: bool = False,
+        raw_body: Optional[bytes] = None,
+    ):
+        """Handle request - to be implemented by subclasses
+
+        ``raw_body`` is the client's original JSON for ``body``, for providers
+        that can forward it unchanged.
+        """
         raise NotImplementedError
 
-    async def get_error_detail(self, response: httpx.Response) -> str:
-        """Extract error details from backend response"""
+    async def send_streaming(
+        self, url: str, payload: Union[Dict[str, Any], bytes], headers: Dict[str, Any]
+    ) -> httpx.Response:
+        """POST to the backend and return once headers arrive, leaving the body unread
+
+        ``payload`` may be pre-encoded JSON bytes, which are sent as-is.
+        """
+        client = get_http_client()
+        content = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+        request = client.build_request("POST", url, content=content, headers=headers)
+        request.headers["Content-Type"] = "application/json"
+        return await client.send(request, stream=True)
+
+    async def iter_response_bytes(
+        self, response: httpx.Response
+    ) -> AsyncGenerator[bytes, None]:
+        """Relay a streamed backend body and release the connection when done"""
         try:
-            error_data = response.json()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def iter_sse_lines(
+        self, response: httpx.Response
+    ) -> AsyncGenerator[bytes, None]:
+        """Split a streamed body into lines as bytes, without decoding to str
+
+        Partial lines are buffered so events split across network chunks are
+        reassembled; a trailing "\r" from CRLF line endings is dropped.
+        """
+        pending = b""
+        async for chunk in response.aiter_bytes():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line[:-1] if line.endswith(b"\r") else line
+        if pending:
+            yield pending[:-1] if pending.endswith(b"\r") else pending
+
+    def get_error_detail(self, response: httpx.Response) -> str:
+        """Extract error details from an already-read backend response"""
+        if "json" not in response.headers.get("content-type", ""):
+            return f"Backend error: {response.status_code} - {response.text[:200]}"
+        try:
+            error_data = orjson.loads(response.content)
             if isinstance(error_data, dict) and "error" in error_data:
                 error_info = error_data["error"]
                 if isinstance(error_info, dict):
@@ -39,17 +139,20 @@ class BaseProvider:
     ) -> Dict[str, Any]:
         """Format response to ensure OpenAI compatibility"""
         # If already in correct format, return as-is
-        if all(
-            key in response_data
-            for key in ["id", "object", "created", "model", "choices"]
-        ):
+        if OPENAI_RESPONSE_KEYS.issubset(response_data.keys()):
             return response_data
 
+        # The clock is only read when the backend response lacks a timestamp
+        if "created" in response_data:
+            created = response_data["created"]
+        else:
+            created = int(time.time())
+
         # Generate OpenAI-compatible response
         formatted_response = {
-            "id": response_data.get("id", f"chatcmpl-{uuid.uuid4().hex[:29]}"),
+            "id": response_data.get("id") or new_completion_id(),
             "object": "chat.completion",
-            "created": response_data.get("created", int(time.time())),
+            "created": created,
             "model": model,
             "choices": [],
             "usage": response_data.get(
@@ -87,69 +190,61 @@ class BaseProvider:
 
     async def stream_response(
         self, response: httpx.Response
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream response from backend while maintaining OpenAI format"""
+        # One fallback id and timestamp per stream, shared by every chunk
+        stream_id = new_completion_id()
+        stream_created = int(time.time())
+
         try:
-            chunk_count = 0
-            async for chunk in response.aiter_text():
-                if chunk:
-                    chunk_count += 1
-                    proxy_logger.debug(f"Processing chunk {chunk_count}")
-
-                    # Parse the SSE chunk
-                    lines = chunk.strip().split("\n")
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith("data: "):
-                            data_part = line[6:]  # Remove 'data: ' prefix
-
-                            if data_part == "[DONE]":
-                                proxy_logger.debug("Stream completed - sending [DONE]")
-                                yield "data: [DONE]\n\n"
-                                return
-
-                            try:
-                                # Parse and re-serialize to ensure valid JSON
-                                chunk_dict = json.loads(data_part)
-
-                                # Create OpenAI-compatible streaming chunk
-                                if "choices" in chunk_dict:
-                                    # Already in correct format
-                                    payload = chunk_dict
-                                else:
-                                    # Convert to OpenAI streaming format
-                                    payload = {
-                                        "id": chunk_dict.get(
-                                            "id", f"chatcmpl-{uuid.uuid4().hex[:29]}"
-                                        ),
-                                        "object": "chat.completion.chunk",
-                                        "created": chunk_dict.get(
-                                            "created", int(time.time())
-                                        ),
-                                        "model": chunk_dict.get("model", "unknown"),
-                                        "choices": [
-                                            {
-                                                "index": 0,
-                                                "delta": chunk_dict.get("delta", {}),
-                                                "finish_reason": chunk_dict.get(
-                                                    "finish_reason"
-                                                ),
-                                            }
-                                        ],
-                                    }
-
-                                yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
-
-                            except json.JSONDecodeError as e:
-                                proxy_logger.warning(
-                                    f"Invalid JSON in stream chunk: {data_part[:100]} - {e}"
-                                )
-                                continue
-                        elif line and not line.startswith("data:"):
-                            proxy_logger.debug(f"Non-data line in stream: {line}")
-
-            proxy_logger.debug(f"Stream completed - processed {chunk_count} chunks")
-            yield "data: [DONE]\n\n"
+            line_count = 0
+            async for line in self.iter_sse_lines(response):
+                if not line:
+                    continue
+                line_count += 1
+
+                if line.startswith(b"data: "):
+                    data_part = line[6:]  # Remove 'data: ' prefix
+
+                    if data_part == b"[DONE]":
+                        proxy_logger.debug("Stream completed - sending [DONE]")
+                        yield b"data: [DONE]\n\n"
+                        return
+
+                    if OPENAI_CHUNK_RE.search(data_part):
+                        # Already in OpenAI format; relay the original bytes
+                        # without a parse/serialize round trip
+                        yield line + b"\n\n"
+                        continue
+
+                    try:
+                        chunk_dict = orjson.loads(data_part)
+                    except orjson.JSONDecodeError as e:
+                        proxy_logger.warning(
+                            "Invalid JSON in stream chunk: %s - %s", data_part[:100], e
+                        )
+                        continue
+
+                    # Convert to OpenAI streaming format
+                    payload = {
+                        "id": chunk_dict.get("id", stream_id),
+                        "object": "chat.completion.chunk",
+                        "created": chunk_dict.get("created", stream_created),
+                        "model": chunk_dict.get("model", "unknown"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": chunk_dict.get("delta", {}),
+                                "finish_reason": chunk_dict.get("finish_reason"),
+                            }
+                        ],
+                    }
+                    yield sse_event(payload)
+                elif not line.startswith(b"data:"):
+                    proxy_logger.debug("Non-data line in stream: %s", line)
+
+            proxy_logger.debug("Stream completed - processed %d lines", line_count)
+            yield b"data: [DONE]\n\n"
 
         except Exception as e:
             proxy_logger.error(f"Exception in stream_response: {str(e)}")
@@ -160,5 +255,7 @@ class BaseProvider:
                     "type": "stream_error",
                 }
             }
-            yield f"data: {json.dumps(error_payload, ensure_ascii=False)}\n\n"
-            yield "data: [DONE]\n\n"
+            yield sse_event(error_payload)
+            yield b"data: [DONE]\n\n"
+        finally:
+            await response.aclose()
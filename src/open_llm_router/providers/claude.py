@@ -1,47 +1,64 @@
 import json
 import time
-import uuid
-from typing import Dict, Any, AsyncGenerator, List
+from typing import Dict, Any, AsyncGenerator, List, Optional
 import httpx
+import orjson
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from .base import BaseProvider
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from .base import BaseProvider, content_chunk_frame, new_completion_id, sse_event
 from ..utils.logger import proxy_logger
+from ..utils.json_response import OrjsonResponse
+from ..utils.http_client import get_http_client
+
+# Message roles passed through to the Anthropic messages list
+ANTHROPIC_ROLES = frozenset({"user", "assistant"})
 
 
 class ClaudeProvider(BaseProvider):
+    def __init__(self, backend: Dict[str, Any]):
+        super().__init__(backend)
+        # Anthropic-specific headers; built once, as the instance is reused
+        # for every request until the backend's API key changes
+        self.request_headers = {
+            "x-api-key": backend["api_key"],
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+
     def convert_openai_to_anthropic_messages(
         self, messages: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Convert OpenAI messages format to Anthropic format"""
-        anthropic_msgs = []
-
-        for i, m in enumerate(messages):
-            proxy_logger.debug(
-                f"Processing message {i}: role={m.get('role')}, has_content={bool(m.get('content'))}"
-            )
+        """Convert OpenAI messages format to Anthropic format
 
-            # Skip messages without content
-            if not m.get("content"):
-                proxy_logger.debug(f"Skipping message {i} - no content")
-                continue
-
-            role = m["role"]
-
-            # Only allow user and assistant roles for Anthropic
-            if role not in ("user", "assistant"):
-                proxy_logger.debug(f"Skipping message {i} - invalid role: {role}")
-                continue
-
-            anthropic_msgs.append({"role": role, "content": m["content"]})
-
-        return anthropic_msgs
+        Messages without content, and roles other than user and assistant
+        (which Anthropic does not accept in this list), are skipped.
+        """
+        if proxy_logger.debug_enabled():
+            for i, m in enumerate(messages):
+                proxy_logger.debug(
+                    "Processing message %d: role=%s, has_content=%s",
+                    i,
+                    m.get("role"),
+                    bool(m.get("content")),
+                )
 
-    async def handle_request(self, body: Dict[str, Any], stream: bool = False):
+        return [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages
+            if m.get("content") and m.get("role") in ANTHROPIC_ROLES
+        ]
+
+    async def handle_request(
+        self,
+        body: Dict[str, Any],
+        stream: bool = False,
+        raw_body: Optional[bytes] = None,
+    ):
         """Handle Claude-specific request processing"""
         model = body.get("model")
-        proxy_logger.info(f"Processing Claude model: {model}")
-        start_time = time.time()
+        proxy_logger.info("Processing Claude model: %s", model)
+        start_ns = time.monotonic_ns()
 
         try:
             # Convert OpenAI messages to Anthropic format
@@ -49,7 +66,9 @@ class ClaudeProvider(BaseProvider):
             anthropic_msgs = self.convert_openai_to_anthropic_messages(messages)
 
             proxy_logger.info(
-                f"Converted {len(messages)} messages to {len(anthropic_msgs)} Anthropic messages"
+                "Converted %d messages to %d Anthropic messages",
+                len(messages),
+                len(anthropic_msgs),
             )
 
             # Build Claude-specific payload (Anthropic API format)
@@ -65,201 +84,199 @@ class ClaudeProvider(BaseProvider):
             if stream:
                 payload["stream"] = True
 
-            proxy_logger.debug(f"Claude payload: {json.dumps(payload, indent=2)}")
-
-            # Build Anthropic-specific headers
-            api_key = self.backend["api_key"]
-            claude_headers = {
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
+            if proxy_logger.debug_enabled():
+                proxy_logger.debug(f"Claude payload: {json.dumps(payload, indent=2)}")
 
             # Generate response ID for OpenAI compatibility
-            openai_resp_id = f"chatcmpl-{uuid.uuid4().hex[:29]}"
-            proxy_logger.info(f"Generated response ID: {openai_resp_id}")
+            openai_resp_id = new_completion_id()
+            proxy_logger.info("Generated response ID: %s", openai_resp_id)
 
             # Log the upstream request
             url = self.backend["base_url"]
             proxy_logger.log_request("claude", model, url, stream)
 
-            async with httpx.AsyncClient(timeout=120) as client:
-                try:
+            client = get_http_client()
+            try:
+                if stream:
+                    # Return once headers arrive, so events are converted and
+                    # relayed as Anthropic sends them
+                    response = await self.send_streaming(
+                        url, payload, self.request_headers
+                    )
+                    proxy_logger.time_and_log_response(
+                        "claude", model, response, start_ns
+                    )
+                    if response.status_code != 200:
+                        await response.aread()
+                        await response.aclose()
+                        raise HTTPException(
+                            status_code=response.status_code,
+                            detail=self.get_error_detail(response),
+                        )
+
+                    proxy_logger.info("Starting Claude streaming response")
+                    return StreamingResponse(
+                        self.claude_stream_response(response, model, openai_resp_id),
+                        media_type="text/event-stream",
+                        headers={
+                            "Cache-Control": "no-cache",
+                            "Connection": "keep-alive",
+                            "X-Accel-Buffering": "no",
+                            "Access-Control-Allow-Origin": "*",
+                            "Access-Control-Allow-Headers": "*",
+                        },
+                        background=BackgroundTask(response.aclose),
+                    )
+                else:
                     response = await client.post(
                         url,
                         json=payload,
-                        headers=claude_headers,
-                        timeout=120,
+                        headers=self.request_headers,
                     )
 
                     # Log the upstream response
                     proxy_logger.time_and_log_response(
-                        "claude", model, response, start_time
+                        "claude", model, response, start_ns
                     )
 
-                    if stream:
-                        proxy_logger.info("Starting Claude streaming response")
-                        return StreamingResponse(
-                            self.claude_stream_response(
-                                response, model, openai_resp_id
-                            ),
-                            media_type="text/event-stream",
-                            headers={
-                                "Cache-Control": "no-cache",
-                                "Connection": "keep-alive",
-                                "Access-Control-Allow-Origin": "*",
-                                "Access-Control-Allow-Headers": "*",
-                            },
+                    proxy_logger.info("Creating Claude non-streaming response")
+                    if response.status_code != 200:
+                        error_detail = self.get_error_detail(response)
+                        raise HTTPException(
+                            status_code=response.status_code, detail=error_detail
                         )
-                    else:
-                        proxy_logger.info("Creating Claude non-streaming response")
-                        if response.status_code != 200:
-                            error_detail = await self.get_error_detail(response)
-                            raise HTTPException(
-                                status_code=response.status_code, detail=error_detail
-                            )
 
-                        resp_json = response.json()
+                    resp_json = orjson.loads(response.content)
+                    if proxy_logger.debug_enabled():
                         proxy_logger.debug(
                             f"Claude response JSON: {json.dumps(resp_json, indent=2)}"
                         )
 
-                        # Convert Claude response to OpenAI format
-                        openai_resp = await self.convert_claude_to_openai_response(
-                            resp_json, model, openai_resp_id
-                        )
-
-                        proxy_logger.info(
-                            "Claude non-streaming response created successfully"
-                        )
-                        return JSONResponse(content=openai_resp)
-
-                except httpx.TimeoutException:
-                    proxy_logger.error(f"Timeout requesting Claude for model {model}")
-                    raise HTTPException(
-                        status_code=504, detail="Request timeout to Claude"
+                    # Convert Claude response to OpenAI format
+                    openai_resp = await self.convert_claude_to_openai_response(
+                        resp_json, model, openai_resp_id
                     )
-                except httpx.RequestError as e:
-                    proxy_logger.error(f"Request error to Claude: {str(e)}")
-                    raise HTTPException(
-                        status_code=502, detail=f"Claude request failed: {str(e)}"
+
+                    proxy_logger.info(
+                        "Claude non-streaming response created successfully"
                     )
+                    return OrjsonResponse(content=openai_resp)
+
+            except httpx.TimeoutException:
+                proxy_logger.error(f"Timeout requesting Claude for model {model}")
+                raise HTTPException(status_code=504, detail="Request timeout to Claude")
+            except httpx.RequestError as e:
+                proxy_logger.error(f"Request error to Claude: {str(e)}")
+                raise HTTPException(
+                    status_code=502, detail=f"Claude request failed: {str(e)}"
+                )
 
+        except HTTPException:
+            # Keep the upstream status, so 4xx errors are not reported as 500s
+            raise
         except Exception as e:
             proxy_logger.error(
                 f"Unexpected error in Claude processing: {str(e)}", exc_info=True
             )
             error_response = {"error": f"Claude model processing failed: {str(e)}"}
-            return JSONResponse(
+            return OrjsonResponse(
                 content=error_response,
                 status_code=500,
             )
 
     async def claude_stream_response(
         self, response: httpx.Response, model: str, openai_resp_id: str
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """Stream Claude response and convert to OpenAI format"""
         try:
-            text_accum = ""
             created_time = int(time.time())
             event_count = 0
+            chunk_prefix, chunk_suffix = content_chunk_frame(
+                openai_resp_id, created_time, model
+            )
 
             proxy_logger.debug("Processing Anthropic Claude stream events")
 
-            # Process the streaming response from Anthropic API
-            async for chunk in response.aiter_text():
-                if not chunk.strip():
-                    continue
-
-                # Anthropic API sends Server-Sent Events format
-                lines = chunk.strip().split("\n")
-                for line in lines:
-                    if line.startswith("data: "):
-                        data_part = line[6:]  # Remove 'data: ' prefix
-
-                        if data_part == "[DONE]":
-                            proxy_logger.info(
-                                f"Claude streaming completed - processed {event_count} events"
-                            )
-                            yield "data: [DONE]\n\n"
-                            return
+            # Anthropic API sends Server-Sent Events; lines are handled as
+            # they arrive, even when an event spans network chunks
+            async for line in self.iter_sse_lines(response):
+                if line.startswith(b"data: "):
+                    data_part = line[6:]  # Remove 'data: ' prefix
 
-                        try:
-                            event_count += 1
-                            event_data = json.loads(data_part)
-                            proxy_logger.debug(
-                                f"Claude event {event_count}: type={event_data.get('type')}"
-                            )
+                    if data_part == b"[DONE]":
+                        proxy_logger.info(
+                            "Claude streaming completed - processed %d events",
+                            event_count,
+                        )
+                        yield b"data: [DONE]\n\n"
+                        return
 
-                            if event_data.get("type") == "content_block_delta":
-                                delta_text = event_data.get("delta", {}).get("text", "")
-                                if not delta_text:
-                                    proxy_logger.debug(
-                                        f"Claude event {event_count}: no delta text"
-                                    )
-                                    continue
-
-                                text_accum += delta_text
-                                stream_payload = {
-                                    "id": openai_resp_id,
-                                    "object": "chat.completion.chunk",
-                                    "created": created_time,
-                                    "model": model,
-                                    "choices": [
-                                        {
-                                            "index": 0,
-                                            "delta": {"content": delta_text},
-                                            "finish_reason": None,
-                                        }
-                                    ],
-                                }
+                    try:
+                        event_count += 1
+                        event_data = orjson.loads(data_part)
+                        proxy_logger.debug(
+                            "Claude event %d: type=%s",
+                            event_count,
+                            event_data.get("type"),
+                        )
 
+                        if event_data.get("type") == "content_block_delta":
+                            delta_text = event_data.get("delta", {}).get("text", "")
+                            if not delta_text:
                                 proxy_logger.debug(
-                                    f"Yielding Claude event {event_count}"
+                                    "Claude event %d: no delta text", event_count
                                 )
-                                yield f"data: {json.dumps(stream_payload, ensure_ascii=False)}\n\n"
-
-                            elif event_data.get("type") == "message_stop":
-                                # Send final chunk with finish_reason
-                                final_payload = {
-                                    "id": openai_resp_id,
-                                    "object": "chat.completion.chunk",
-                                    "created": created_time,
-                                    "model": model,
-                                    "choices": [
-                                        {
-                                            "index": 0,
-                                            "delta": {},
-                                            "finish_reason": "stop",
-                                        }
-                                    ],
-                                }
-                                yield f"data: {json.dumps(final_payload, ensure_ascii=False)}\n\n"
-
-                                proxy_logger.info(
-                                    f"Claude streaming completed - processed {event_count} events"
-                                )
-                                yield "data: [DONE]\n\n"
-                                return
+                                continue
+
+                            proxy_logger.debug("Yielding Claude event %d", event_count)
+                            yield chunk_prefix + orjson.dumps(delta_text) + chunk_suffix
+
+                        elif event_data.get("type") == "message_stop":
+                            # Send final chunk with finish_reason
+                            final_payload = {
+                                "id": openai_resp_id,
+                                "object": "chat.completion.chunk",
+                                "created": created_time,
+                                "model": model,
+                                "choices": [
+                                    {
+                                        "index": 0,
+                                        "delta": {},
+                                        "finish_reason": "stop",
+                                    }
+                                ],
+                            }
+                            yield sse_event(final_payload)
 
-                        except json.JSONDecodeError as e:
-                            proxy_logger.warning(
-                                f"Invalid JSON in Claude stream chunk: {data_part[:100]} - {e}"
+                            proxy_logger.info(
+                                "Claude streaming completed - processed %d events",
+                                event_count,
                             )
-                            continue
+                            yield b"data: [DONE]\n\n"
+                            return
+
+                    except orjson.JSONDecodeError as e:
+                        proxy_logger.warning(
+                            "Invalid JSON in Claude stream chunk: %s - %s",
+                            data_part[:100],
+                            e,
+                        )
+                        continue
 
             proxy_logger.debug(
-                f"Claude stream completed - processed {event_count} events"
+                "Claude stream completed - processed %d events", event_count
             )
-            yield "data: [DONE]\n\n"
+            yield b"data: [DONE]\n\n"
 
         except Exception as e:
             proxy_logger.error(
                 f"Exception in Claude event generator: {str(e)}", exc_info=True
             )
             error_payload = {"error": f"Claude stream processing failed: {str(e)}"}
-            yield f"data: {json.dumps(error_payload, ensure_ascii=False)}\n\n"
-            yield "data: [DONE]\n\n"
+            yield sse_event(error_payload)
+            yield b"data: [DONE]\n\n"
+        finally:
+            await response.aclose()
 
     async def convert_claude_to_openai_response(
         self, resp_json: Dict[str, Any], model: str, openai_resp_id: str
@@ -279,14 +296,14 @@ class ClaudeProvider(BaseProvider):
                     if block.get("type") == "text":
                         answer += block.get("text", "")
                 proxy_logger.debug(
-                    f"Extracted answer from content blocks: {len(answer)} chars"
+                    "Extracted answer from content blocks: %d chars", len(answer)
                 )
 
             elif "completion" in resp_json:
                 # Legacy format fallback
                 answer = resp_json["completion"]
                 proxy_logger.debug(
-                    f"Extracted answer from completion: {len(answer)} chars"
+                    "Extracted answer from completion: %d chars", len(answer)
                 )
 
             else:
@@ -1,60 +1,75 @@
 import json
 import time
-import uuid
-from typing import Dict, Any, AsyncGenerator, List
+from typing import Dict, Any, AsyncGenerator, List, Optional
 import httpx
+import orjson
 from fastapi import HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from .base import BaseProvider
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from .base import BaseProvider, content_chunk_frame, new_completion_id, sse_event
 from ..utils.logger import proxy_logger
+from ..utils.json_response import OrjsonResponse
+from ..utils.http_client import get_http_client
+
+# Gemini finishReason values mapped to OpenAI finish_reason
+GEMINI_FINISH_REASONS = {
+    "STOP": "stop",
+    "MAX_TOKENS": "length",
+    "SAFETY": "content_filter",
+    "RECITATION": "content_filter",
+    "OTHER": "stop",
+}
 
 
 class GeminiProvider(BaseProvider):
     def __init__(self, backend: Dict[str, Any], backends_config: Dict[str, Any]):
         super().__init__(backend)
         self.backends_config = backends_config
+        # Gemini-specific headers and base URL; built once, as the instance is
+        # reused for every request until the backend's API key changes
+        self.request_headers = {
+            "Content-Type": "application/json",
+            "X-goog-api-key": backend["api_key"],
+        }
+        # Use the base_url from the converted backend configuration
+        self.base_url = backend.get(
+            "base_url", "https://generativelanguage.googleapis.com/v1beta"
+        ).rstrip("/")
 
     def convert_openai_to_gemini_messages(
         self, messages: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """Convert OpenAI messages format to Gemini format"""
-        gemini_contents = []
-
-        for i, m in enumerate(messages):
-            proxy_logger.debug(
-                f"Processing message {i}: role={m.get('role')}, has_content={bool(m.get('content'))}"
-            )
-
-            # Skip messages without content
-            if not m.get("content"):
-                proxy_logger.debug(f"Skipping message {i} - no content")
-                continue
+        """Convert OpenAI messages format to Gemini format
 
-            role = m["role"]
-            content = m["content"]
-
-            # Convert role to Gemini format (user stays user, assistant becomes model)
-            gemini_role = "user" if role == "user" else "model"
-
-            # Skip system messages as Gemini doesn't support them in the same way
-            if role == "system":
+        Messages without content, and system messages (which Gemini does not
+        support in this list), are skipped.
+        """
+        if proxy_logger.debug_enabled():
+            for i, m in enumerate(messages):
                 proxy_logger.debug(
-                    f"Skipping message {i} - system role not supported in Gemini"
+                    "Processing message %d: role=%s, has_content=%s",
+                    i,
+                    m.get("role"),
+                    bool(m.get("content")),
                 )
-                continue
-
-            # Create Gemini content format (no role needed for request)
-            gemini_content = {"parts": [{"text": content}]}
-
-            gemini_contents.append(gemini_content)
 
-        return gemini_contents
-
-    async def handle_request(self, body: Dict[str, Any], stream: bool = False):
+        # Gemini content format (no role needed for request)
+        return [
+            {"parts": [{"text": content}]}
+            for m in messages
+            if (content := m.get("content")) and m.get("role") != "system"
+        ]
+
+    async def handle_request(
+        self,
+        body: Dict[str, Any],
+        stream: bool = False,
+        raw_body: Optional[bytes] = None,
+    ):
         """Handle Gemini-specific request processing"""
         model = body.get("model")
-        proxy_logger.info(f"Processing Gemini model: {model}")
-        start_time = time.time()
+        proxy_logger.info("Processing Gemini model: %s", model)
+        start_ns = time.monotonic_ns()
 
         try:
             # Convert OpenAI messages to Gemini format
@@ -62,7 +77,9 @@ class GeminiProvider(BaseProvider):
             gemini_contents = self.convert_openai_to_gemini_messages(messages)
 
             proxy_logger.info(
-                f"Converted {len(messages)} messages to {len(gemini_contents)} Gemini contents"
+                "Converted %d messages to %d Gemini contents",
+                len(messages),
+                len(gemini_contents),
             )
 
             # Build Gemini-specific payload
@@ -84,109 +101,115 @@ class GeminiProvider(BaseProvider):
                 # This will be handled in the URL construction below
                 pass
 
-            proxy_logger.debug(f"Gemini payload: {json.dumps(payload, indent=2)}")
+            if proxy_logger.debug_enabled():
+                proxy_logger.debug(f"Gemini payload: {json.dumps(payload, indent=2)}")
 
             # Get model name from the request
             model_name = body.get("model", "gemini-pro")
 
-            # Build Gemini-specific headers and URL
-            api_key = self.backend["api_key"]
-            gemini_headers = {
-                "Content-Type": "application/json",
-                "X-goog-api-key": api_key,
-            }
-
             # Construct the full URL with model name and endpoint type
-            # Use the base_url from the converted backend configuration
-            gemini_base_url = self.backend.get(
-                "base_url", "https://generativelanguage.googleapis.com/v1beta"
-            ).rstrip("/")
+            gemini_base_url = self.base_url
             if stream:
-                # Use streaming endpoint
-                gemini_url = (
-                    f"{gemini_base_url}/models/{model_name}:streamGenerateContent"
-                )
+                # Use streaming endpoint, framed as SSE rather than a JSON array
+                gemini_url = f"{gemini_base_url}/models/{model_name}:streamGenerateContent?alt=sse"
             else:
                 # Use regular endpoint
                 gemini_url = f"{gemini_base_url}/models/{model_name}:generateContent"
 
-            proxy_logger.info(f"Gemini URL: {gemini_url}")
+            proxy_logger.info("Gemini URL: %s", gemini_url)
 
             # Generate response ID for OpenAI compatibility
-            openai_resp_id = f"chatcmpl-{uuid.uuid4().hex[:29]}"
-            proxy_logger.info(f"Generated response ID: {openai_resp_id}")
+            openai_resp_id = new_completion_id()
+            proxy_logger.info("Generated response ID: %s", openai_resp_id)
 
             # Log the upstream request
             proxy_logger.log_request("gemini", model, gemini_url, stream)
 
-            async with httpx.AsyncClient(timeout=120) as client:
-                try:
+            client = get_http_client()
+            try:
+                if stream:
+                    # Return once headers arrive, so events are converted and
+                    # relayed as Gemini sends them
+                    response = await self.send_streaming(
+                        gemini_url, payload, self.request_headers
+                    )
+                    proxy_logger.time_and_log_response(
+                        "gemini", model, response, start_ns
+                    )
+                    if response.status_code != 200:
+                        await response.aread()
+                        await response.aclose()
+                        raise HTTPException(
+                            status_code=response.status_code,
+                            detail=self.get_error_detail(response),
+                        )
+
+                    proxy_logger.info("Starting Gemini streaming response")
+                    return StreamingResponse(
+                        self.gemini_stream_response(response, model, openai_resp_id),
+                        media_type="text/event-stream",
+                        headers={
+                            "Cache-Control": "no-cache",
+                            "Connection": "keep-alive",
+                            "X-Accel-Buffering": "no",
+                            "Access-Control-Allow-Origin": "*",
+                            "Access-Control-Allow-Headers": "*",
+                        },
+                        background=BackgroundTask(response.aclose),
+                    )
+                else:
                     response = await client.post(
                         gemini_url,
                         json=payload,
-                        headers=gemini_headers,
-                        timeout=120,
+                        headers=self.request_headers,
                     )
 
                     # Log the upstream response
                     proxy_logger.time_and_log_response(
-                        "gemini", model, response, start_time
+                        "gemini", model, response, start_ns
                     )
 
-                    if stream:
-                        proxy_logger.info("Starting Gemini streaming response")
-                        return StreamingResponse(
-                            self.gemini_stream_response(
-                                response, model, openai_resp_id
-                            ),
-                            media_type="text/event-stream",
-                            headers={
-                                "Cache-Control": "no-cache",
-                                "Connection": "keep-alive",
-                                "Access-Control-Allow-Origin": "*",
-                                "Access-Control-Allow-Headers": "*",
-                            },
+                    proxy_logger.info("Creating Gemini non-streaming response")
+                    if response.status_code != 200:
+                        error_detail = self.get_error_detail(response)
+                        raise HTTPException(
+                            status_code=response.status_code, detail=error_detail
                         )
-                    else:
-                        proxy_logger.info("Creating Gemini non-streaming response")
-                        if response.status_code != 200:
-                            error_detail = await self.get_error_detail(response)
-                            raise HTTPException(
-                                status_code=response.status_code, detail=error_detail
-                            )
-
-                        resp_json = response.json()
+
+                    resp_json = orjson.loads(response.content)
+                    if proxy_logger.debug_enabled():
                         proxy_logger.debug(
                             f"Gemini response JSON: {json.dumps(resp_json, indent=2)}"
                         )
 
-                        # Convert Gemini response to OpenAI format
-                        openai_resp = await self.convert_gemini_to_openai_response(
-                            resp_json, model, openai_resp_id
-                        )
-
-                        proxy_logger.info(
-                            "Gemini non-streaming response created successfully"
-                        )
-                        return JSONResponse(content=openai_resp)
-
-                except httpx.TimeoutException:
-                    proxy_logger.error(f"Timeout requesting Gemini for model {model}")
-                    raise HTTPException(
-                        status_code=504, detail="Request timeout to Gemini"
+                    # Convert Gemini response to OpenAI format
+                    openai_resp = await self.convert_gemini_to_openai_response(
+                        resp_json, model, openai_resp_id
                     )
-                except httpx.RequestError as e:
-                    proxy_logger.error(f"Request error to Gemini: {str(e)}")
-                    raise HTTPException(
-                        status_code=502, detail=f"Gemini request failed: {str(e)}"
+
+                    proxy_logger.info(
+                        "Gemini non-streaming response created successfully"
                     )
+                    return OrjsonResponse(content=openai_resp)
+
+            except httpx.TimeoutException:
+                proxy_logger.error(f"Timeout requesting Gemini for model {model}")
+                raise HTTPException(status_code=504, detail="Request timeout to Gemini")
+            except httpx.RequestError as e:
+                proxy_logger.error(f"Request error to Gemini: {str(e)}")
+                raise HTTPException(
+                    status_code=502, detail=f"Gemini request failed: {str(e)}"
+                )
 
+        except HTTPException:
+            # Keep the upstream status, so 4xx errors are not reported as 500s
+            raise
         except Exception as e:
             proxy_logger.error(
                 f"Unexpected error in Gemini processing: {str(e)}", exc_info=True
             )
             error_response = {"error": f"Gemini model processing failed: {str(e)}"}
-            return JSONResponse(
+            return OrjsonResponse(
                 content=error_response,
                 status_code=500,
             )
@@ -211,7 +234,7 @@ class GeminiProvider(BaseProvider):
                         if part.get("text"):
                             answer += part["text"]
                     proxy_logger.debug(
-                        f"Extracted answer from Gemini parts: {len(answer)} chars"
+                        "Extracted answer from Gemini parts: %d chars", len(answer)
                     )
             else:
                 proxy_logger.error("Error extracting answer from Gemini response")
@@ -231,14 +254,7 @@ class GeminiProvider(BaseProvider):
             ):
                 gemini_finish = resp_json["candidates"][0]["finishReason"]
                 # Map Gemini finish reasons to OpenAI format
-                finish_reason_map = {
-                    "STOP": "stop",
-                    "MAX_TOKENS": "length",
-                    "SAFETY": "content_filter",
-                    "RECITATION": "content_filter",
-                    "OTHER": "stop",
-                }
-                finish_reason = finish_reason_map.get(gemini_finish, "stop")
+                finish_reason = GEMINI_FINISH_REASONS.get(gemini_finish, "stop")
         except Exception as e:
             proxy_logger.warning(
                 f"Could not extract finish reason from Gemini response: {e}"
@@ -279,161 +295,76 @@ class GeminiProvider(BaseProvider):
         return openai_resp
 
     async def gemini_stream_response(
-        self, response, model: str, openai_resp_id: str
-    ) -> AsyncGenerator[str, None]:
+        self, response: httpx.Response, model: str, openai_resp_id: str
+    ) -> AsyncGenerator[bytes, None]:
         """
-        Streams Gemini API array responses as OpenAI-compatible SSE stream.
+        Streams Gemini SSE events (``:streamGenerateContent?alt=sse``) as
+        OpenAI-compatible SSE chunks.
 
-        Gemini's :streamGenerateContent returns an array of JSON objects:
-        [ {...}, {...}, ... ]
-        This function parses that stream robustly and yields OpenAI API style chunks.
+        Each ``data:`` line carries one GenerateContentResponse; events split
+        across network chunks are reassembled by iter_sse_lines.
         """
-        buffer = ""
-        started = False
-        ended = False
         created_time = int(time.time())
-        text_accum = ""
-
-        brace_level = 0
-        obj_buffer = ""
-        inside_obj = False
+        chunk_prefix, chunk_suffix = content_chunk_frame(
+            openai_resp_id, created_time, model
+        )
 
         try:
-            async for chunk in response.aiter_text():
-                if not chunk.strip():
+            async for line in self.iter_sse_lines(response):
+                if not line.startswith(b"data: "):
                     continue
-                buffer += chunk
-
-                # Remove array opening bracket (if present in the first chunk)
-                if not started:
-                    buffer = buffer.lstrip()
-                    if buffer.startswith("["):
-                        buffer = buffer[1:]
-                        started = True
-
-                i = 0
-                while i < len(buffer):
-                    c = buffer[i]
-                    if not inside_obj:
-                        if c == "{":
-                            inside_obj = True
-                            brace_level = 1
-                            obj_buffer = "{"
-                        i += 1
-                        continue
-                    else:
-                        obj_buffer += c
-                        if c == "{":
-                            brace_level += 1
-                        elif c == "}":
-                            brace_level -= 1
-                            if brace_level == 0:
-                                # Complete JSON object found
-                                try:
-                                    event_data = json.loads(obj_buffer)
-                                    # ---- Begin OpenAI chunk conversion logic ----
-                                    # This part is critical: convert Gemini response object to OpenAI SSE chunk(s)
-                                    if "candidates" in event_data:
-                                        candidates = event_data["candidates"]
-                                        if candidates and len(candidates) > 0:
-                                            candidate = candidates[0]
-                                            # Output delta chunk
-                                            if (
-                                                "content" in candidate
-                                                and "parts" in candidate["content"]
-                                            ):
-                                                parts = candidate["content"]["parts"]
-                                                delta_text = ""
-                                                for part in parts:
-                                                    if "text" in part:
-                                                        full_text = part["text"]
-                                                        if full_text.startswith(
-                                                            text_accum
-                                                        ):
-                                                            delta_text = full_text[
-                                                                len(text_accum) :
-                                                            ]
-                                                            text_accum = full_text
-                                                        else:
-                                                            delta_text = full_text
-                                                            text_accum += delta_text
-                                                if delta_text:
-                                                    stream_payload = {
-                                                        "id": openai_resp_id,
-                                                        "object": "chat.completion.chunk",
-                                                        "created": created_time,
-                                                        "model": model,
-                                                        "choices": [
-                                                            {
-                                                                "index": 0,
-                                                                "delta": {
-                                                                    "content": delta_text
-                                                                },
-                                                                "finish_reason": None,
-                                                            }
-                                                        ],
-                                                    }
-                                                    yield f"data: {json.dumps(stream_payload, ensure_ascii=False)}\n\n"
-
-                                            # Output finish reason
-                                            if "finishReason" in candidate:
-                                                gemini_finish = candidate[
-                                                    "finishReason"
-                                                ]
-                                                finish_reason_map = {
-                                                    "STOP": "stop",
-                                                    "MAX_TOKENS": "length",
-                                                    "SAFETY": "content_filter",
-                                                    "RECITATION": "content_filter",
-                                                    "OTHER": "stop",
-                                                }
-                                                finish_reason = finish_reason_map.get(
-                                                    gemini_finish, "stop"
-                                                )
-                                                # Send final chunk with finish_reason
-                                                final_payload = {
-                                                    "id": openai_resp_id,
-                                                    "object": "chat.completion.chunk",
-                                                    "created": created_time,
-                                                    "model": model,
-                                                    "choices": [
-                                                        {
-                                                            "index": 0,
-                                                            "delta": {},
-                                                            "finish_reason": finish_reason,
-                                                        }
-                                                    ],
-                                                }
-                                                yield f"data: {json.dumps(final_payload, ensure_ascii=False)}\n\n"
-                                                yield "data: [DONE]\n\n"
-                                                ended = True
-                                                return
-                                    # ---- End OpenAI chunk conversion logic ----
-                                except Exception as e:
-                                    # Ignore parse errors, continue
-                                    pass
-                                inside_obj = False
-                                obj_buffer = ""
-                        i += 1
-
-                # Trim processed buffer (keep only unparsed part)
-                if not inside_obj:
-                    buffer = buffer[i:]
-                else:
-                    buffer = buffer[i - len(obj_buffer) :]
+                data_part = line[6:]  # Remove 'data: ' prefix
 
-                # If end of array, stop
-                if buffer.strip().startswith("]"):
-                    break
+                try:
+                    event_data = orjson.loads(data_part)
+                except orjson.JSONDecodeError as e:
+                    proxy_logger.warning(
+                        "Invalid JSON in Gemini stream chunk: %s - %s",
+                        data_part[:100],
+                        e,
+                    )
+                    continue
 
-            if not ended:
-                yield "data: [DONE]\n\n"
+                candidates = event_data.get("candidates")
+                if not candidates:
+                    continue
+                candidate = candidates[0]
+
+                # With alt=sse every part's text is already an incremental delta
+                for part in candidate.get("content", {}).get("parts", ()):
+                    delta_text = part.get("text")
+                    if delta_text:
+                        yield chunk_prefix + orjson.dumps(delta_text) + chunk_suffix
+
+                # Output finish reason
+                if "finishReason" in candidate:
+                    finish_reason = GEMINI_FINISH_REASONS.get(
+                        candidate["finishReason"], "stop"
+                    )
+                    # Send final chunk with finish_reason
+                    final_payload = {
+                        "id": openai_resp_id,
+                        "object": "chat.completion.chunk",
+                        "created": created_time,
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {},
+                                "finish_reason": finish_reason,
+                            }
+                        ],
+                    }
+                    yield sse_event(final_payload)
+                    yield b"data: [DONE]\n\n"
+                    return
+
+            yield b"data: [DONE]\n\n"
         except Exception as e:
             # Log and yield an error as OpenAI format
-            import traceback
-
-            proxy_logger.error("Error in gemini_stream_response:", str(e))
-            proxy_logger.error(traceback.format_exc())
+            proxy_logger.error("Error in gemini_stream_response: %s", e, exc_info=True)
             error_payload = {"error": f"Gemini stream processing failed: {str(e)}"}
-            yield f"data: {json.dumps(error_payload, ensure_ascii=False)}\n\n"
-            yield "data: [DONE]\n\n"
+            yield sse_event(error_payload)
+            yield b"data: [DONE]\n\n"
+        finally:
+            await response.aclose()
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Mapping, Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTasks
+from .logger import proxy_logger
+
+# Per-backend guards, created on first use and dropped on config reload
+_guards: Dict[str, "BackendGuard"] = {}
+
+
+class BackendGuard:
+    """Bound in-flight requests to one backend and fail fast while it is down
+
+    Used as ``async with guard:`` around the upstream call, or as acquire()
+    followed by release() or release_after() when a streaming body should
+    keep its slot until it has been sent. After ``max_failures`` consecutive
+    server-side failures the circuit opens and requests are rejected with 503
+    for ``cooldown`` seconds; after that they are let through again, and the
+    next failure reopens it straight away.
+    """
+
+    __slots__ = (
+        "backend_name",
+        "semaphore",
+        "max_failures",
+        "cooldown",
+        "failures",
+        "opened_at",
+    )
+
+    def __init__(
+        self,
+        backend_name: str,
+        max_parallel: int,
+        max_failures: int = 5,
+        cooldown: float = 30.0,
+    ):
+        self.backend_name = backend_name
+        self.semaphore = asyncio.Semaphore(max_parallel)
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self.max_failures > 0
+            and self.failures >= self.max_failures
+            and time.monotonic() - self.opened_at < self.cooldown
+        )
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release(exc)
+        return False
+
+    async def acquire(self):
+        """Wait for a free slot, or raise 503 while the circuit is open"""
+        if self.is_open:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Backend {self.backend_name} is temporarily unavailable",
+            )
+        await self.semaphore.acquire()
+
+    def release(self, exc: Optional[BaseException] = None):
+        """Free the slot and record the call's outcome"""
+        self.semaphore.release()
+        self.record_result(exc)
+
+    def release_after(self, response: Any) -> Any:
+        """Record a call's outcome, freeing its slot once ``response`` is sent
+
+        A 5xx response counts as a failure, since some providers report
+        upstream errors and timeouts that way instead of raising. A streaming
+        body keeps the slot until it is exhausted or closed, so the limit
+        bounds open upstream streams rather than only time to headers.
+        """
+        if getattr(response, "status_code", 200) >= 500:
+            self.record_failure()
+        else:
+            self.failures = 0
+        if not isinstance(response, StreamingResponse):
+            self.semaphore.release()
+            return response
+
+        released = False
+
+        def release_slot():
+            nonlocal released
+            if not released:
+                released = True
+                self.semaphore.release()
+
+        async def release_after_send():
+            # Async, so Starlette runs it on the event loop, not a thread
+            release_slot()
+
+        response.body_iterator = _release_when_done(
+            response.body_iterator, release_slot
+        )
+        # Also released after sending, in case the body is never iterated
+        tasks = BackgroundTasks()
+        if response.background is not None:
+            tasks.add_task(response.background)
+        tasks.add_task(release_after_send)
+        response.background = tasks
+        return response
+
+    def record_result(self, exc: Optional[BaseException]):
+        if exc is None or (isinstance(exc, HTTPException) and exc.status_code < 500):
+            self.failures = 0
+        elif isinstance(exc, Exception):
+            self.record_failure()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.max_failures > 0 and self.failures >= self.max_failures:
+            if self.failures == self.max_failures:
+                proxy_logger.warning(
+                    f"Circuit opened for {self.backend_name} after "
+                    f"{self.failures} consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+
+
+async def _release_when_done(
+    body_iterator: AsyncIterator[Any], release_slot: Callable[[], None]
+) -> AsyncIterator[Any]:
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        release_slot()
+
+
+def get_backend_guard(backend: Mapping[str, Any]) -> BackendGuard:
+    """Return the guard for a resolved backend, creating it on first use"""
+    backend_name = backend["backend_name"]
+    guard = _guards.get(backend_name)
+    if guard is None:
+        max_parallel = backend["config"].get("max_parallel") or int(
+            os.getenv("LLM_MAX_PARALLEL", "128")
+        )
+        guard = _guards[backend_name] = BackendGuard(
+            backend_name,
+            max_parallel,
+            max_failures=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
+        )
+    return guard
+
+
+def reset_backend_guards():
+    """Forget all guards so limits from a reloaded config take effect"""
+    _guards.clear()
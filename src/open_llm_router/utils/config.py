@@ -1,42 +1,94 @@
-import json
+import functools
+import hashlib
+import orjson
 import yaml
 import os
 import re
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from .logger import proxy_logger
 
+# Prefer the LibYAML-backed loader; the pure-Python one is several times slower
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
+# Absolute project root and config candidates, in order of preference
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+_CONFIG_CANDIDATES = (
+    (_PROJECT_ROOT / "conf/config.yml", 'yaml'),   # LiteLLM config.yml (primary)
+    (_PROJECT_ROOT / "conf/config.yaml", 'yaml'),  # LiteLLM config.yaml (alternative)
+    (_PROJECT_ROOT / "conf/config.json", 'json'),  # LiteLLM config as JSON
+)
+_CONVERTER_MTIME_NS = Path(__file__).stat().st_mtime_ns
+
+# Leading alphabetic family of a model name, e.g. "gpt-" or "claude-sonnet"
+_MODEL_PREFIX_RE = re.compile(r'^([a-zA-Z]+-?[a-zA-Z]*)')
+
+# Default endpoint and API key reference per internal provider
+_PROVIDER_DEFAULTS = {
+    "openai": ("https://api.openai.com/v1/chat/completions", "os.environ/OPENAI_API_KEY"),
+    "claude": ("https://api.anthropic.com/v1/messages", "os.environ/CLAUDE_API_KEY"),
+    "gemini": (
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
+        "os.environ/GEMINI_API_KEY",
+    ),
+    "grok": ("https://api.x.ai/v1/chat/completions", "os.environ/GROK_API_KEY"),
+}
+
+# LiteLLM "provider/model" prefixes -> internal provider
+_PREFIX_PROVIDERS = {
+    "openai": "openai",
+    "azure": "openai",
+    "anthropic": "claude",
+    "bedrock": "claude",
+    "vertex_ai": "gemini",
+    "gemini": "gemini",
+    "groq": "grok",
+}
+
+# Bare model name prefixes -> internal provider, checked in order
+_BARE_MODEL_PREFIXES = (
+    ("gpt-", "openai"),
+    ("o", "openai"),
+    ("claude-", "claude"),
+    ("gemini-", "gemini"),
+    ("grok-", "grok"),
+)
+
 
 class BackendConfig:
+    __slots__ = ("_config", "_source_stamp")
+
     def __init__(self):
         self._config = None
+        self._source_stamp = None
 
-    def load_backends(self) -> Dict[str, Any]:
-        """Load backend configurations from various formats (JSON, YAML, LiteLLM)"""
-        if self._config is not None:
-            return self._config
-
-        # Use absolute paths from the project root
-        project_root = Path(__file__).parent.parent.parent.parent
+    def load_backends(self, revalidate: bool = False) -> Mapping[str, Any]:
+        """Load backend configurations from various formats (JSON, YAML, LiteLLM)
 
-        # Check for configuration files in order of preference
-        config_files = [
-            project_root / "conf/config.yml",        # LiteLLM config.yml (primary)
-            project_root / "conf/config.yaml",       # LiteLLM config.yaml (alternative)
-        ]
+        With ``revalidate`` the config file is stat'ed again and only re-parsed
+        if it changed since the last load.
+        """
+        if self._config is not None and not revalidate:
+            return self._config
 
         config_source = None
         config_format = None
-
-        for config_file in config_files:
-            if config_file.exists():
-                config_source = config_file
-                if config_file.suffix in ['.yml', '.yaml']:
-                    config_format = 'yaml'
-                else:
-                    config_format = 'json'
-                proxy_logger.info(f"Loading backend config from {config_file} (format: {config_format})")
-                break
+        config_stat = None
+
+        # Check for configuration files in order of preference; one stat per
+        # candidate, reused below for the cache stamp
+        for config_file, file_format in _CONFIG_CANDIDATES:
+            try:
+                config_stat = config_file.stat()
+            except FileNotFoundError:
+                continue
+            config_source = config_file
+            config_format = file_format
+            break
 
         if config_source is None:
             proxy_logger.error(
@@ -45,12 +97,30 @@ class BackendConfig:
             proxy_logger.error(
                 "See conf/config.example.yml for a template or LITELLM_COMPATIBILITY.md for documentation"
             )
-            raise FileNotFoundError("LiteLLM configuration file (config.yml/config.yaml) is required")
+            raise FileNotFoundError("LiteLLM configuration file (config.yml/config.yaml/config.json) is required")
+
+        source_stamp = (config_source, config_stat.st_mtime_ns, config_stat.st_size)
+        if self._config is not None and source_stamp == self._source_stamp:
+            proxy_logger.debug("Backend config %s unchanged, keeping loaded config", config_source)
+            return self._config
+        proxy_logger.info(f"Loading backend config from {config_source} (format: {config_format})")
+
+        # Reuse the converted config from disk if the source file is unchanged
+        cache_path, cache_stamp = self._cache_entry(config_source, config_stat)
+        cached = self._read_cache(cache_path, cache_stamp)
+        if cached is not None:
+            proxy_logger.info(f"Using cached backend config for {config_source}")
+            self._config = MappingProxyType(cached)
+            self._source_stamp = source_stamp
+            return self._config
 
         try:
-            with open(config_source, "r") as f:
-                config = yaml.safe_load(f)
-                proxy_logger.debug(f"Loaded config with keys: {list(config.keys())}")
+            raw = config_source.read_bytes()
+            if config_format == 'json':
+                config = orjson.loads(raw)
+            else:
+                config = yaml.load(raw, Loader=YamlSafeLoader)
+            proxy_logger.debug("Loaded config with keys: %s", list(config))
         except Exception as e:
             proxy_logger.error(f"Failed to load config from {config_source}: {e}")
             raise
@@ -63,10 +133,49 @@ class BackendConfig:
             proxy_logger.error("See conf/config.example.yml for correct format")
             raise ValueError("Configuration must contain 'model_list' section with LiteLLM format")
 
-        self._config = config
-        return config
-
-
+        self._write_cache(cache_path, cache_stamp, config)
+        # Shared read-only view: callers can neither mutate it nor need to copy it
+        self._config = MappingProxyType(config)
+        self._source_stamp = source_stamp
+        return self._config
+
+    def _cache_entry(self, config_source: Path, stat: os.stat_result):
+        """Return the on-disk cache path and validity stamp for a config file"""
+        if os.getenv("LLM_CONFIG_CACHE", "1") == "0":
+            return None, None
+        cache_dir = Path(
+            os.getenv("OPEN_LLM_ROUTER_CACHE_DIR")
+            or Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "open_llm_router"
+        )
+        # The converter's own mtime is part of the stamp so code changes invalidate it
+        stamp = [str(config_source), stat.st_mtime_ns, stat.st_size, _CONVERTER_MTIME_NS]
+        digest = hashlib.sha1(str(config_source).encode()).hexdigest()[:16]
+        return cache_dir / f"config-{digest}.json", stamp
+
+    def _read_cache(self, cache_path: Optional[Path], stamp) -> Optional[Dict[str, Any]]:
+        """Load a cached converted config if its stamp still matches"""
+        if cache_path is None:
+            return None
+        try:
+            cached = orjson.loads(cache_path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        if not isinstance(cached, dict) or cached.get("stamp") != stamp:
+            return None
+        return cached.get("config")
+
+    def _write_cache(self, cache_path: Optional[Path], stamp, config: Dict[str, Any]):
+        """Atomically persist the converted config; failures only cost a re-parse"""
+        if cache_path is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(orjson.dumps({"stamp": stamp, "config": config}))
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError) as e:
+            # TypeError covers configs orjson cannot encode, e.g. non-str keys
+            proxy_logger.debug(f"Could not write config cache {cache_path}: {e}")
 
     def _convert_litellm_format(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Convert LiteLLM config.yml format to Open LLM Router internal format"""
@@ -104,12 +213,19 @@ class BackendConfig:
                     "base_url": api_base,
                     "api_key_env": self._extract_env_var(api_key),
                     "models": [],
-                    "model_prefixes": []
+                    "model_set": set(),  # O(1) dedup; only "models" is exported
+                    "model_prefixes": [],
+                    "max_parallel": None,
                 }
 
             # Add model to provider
-            if actual_model not in providers_data[provider_name]["models"]:
-                providers_data[provider_name]["models"].append(actual_model)
+            provider_entry = providers_data[provider_name]
+            max_parallel = litellm_params.get("max_parallel_requests")
+            if max_parallel:
+                provider_entry["max_parallel"] = max(provider_entry["max_parallel"] or 0, int(max_parallel))
+            if actual_model not in provider_entry["model_set"]:
+                provider_entry["model_set"].add(actual_model)
+                provider_entry["models"].append(actual_model)
 
             # Create model alias if different from actual model
             if model_name != actual_model:
@@ -123,8 +239,10 @@ class BackendConfig:
                 "api_key_env": provider_data["api_key_env"],
                 "headers_template": {"Authorization": "Bearer {api_key}"},
                 "models": provider_data["models"],
-                "model_prefixes": self._infer_model_prefixes(provider_data["models"])
+                "model_prefixes": list(self._infer_model_prefixes(tuple(provider_data["models"])))
             }
+            if provider_data["max_parallel"]:
+                legacy_config["backends"][provider_name]["max_parallel"] = provider_data["max_parallel"]
 
         legacy_config["model_aliases"] = model_aliases
 
@@ -136,75 +254,35 @@ class BackendConfig:
     def _parse_litellm_model(self, litellm_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Parse LiteLLM model parameters to extract provider and model info"""
         model_param = litellm_params.get("model", "")
-        api_base = litellm_params.get("api_base", "")
-        api_key = litellm_params.get("api_key", "")
 
         # Handle different LiteLLM model formats
         if "/" in model_param:
             provider_prefix, model_name = model_param.split("/", 1)
-
-            if provider_prefix in ["openai", "azure"]:
-                return {
-                    "provider": "openai",
-                    "model": model_name,
-                    "api_base": api_base or "https://api.openai.com/v1/chat/completions",
-                    "api_key": api_key or "os.environ/OPENAI_API_KEY"
-                }
-            elif provider_prefix in ["anthropic", "bedrock"] and "claude" in model_name:
-                return {
-                    "provider": "claude",
-                    "model": model_name,
-                    "api_base": api_base or "https://api.anthropic.com/v1/messages",
-                    "api_key": api_key or "os.environ/CLAUDE_API_KEY"
-                }
-            elif provider_prefix in ["vertex_ai", "gemini"]:
-                return {
-                    "provider": "gemini",
-                    "model": model_name,
-                    "api_base": api_base or "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
-                    "api_key": api_key or "os.environ/GEMINI_API_KEY"
-                }
-            elif provider_prefix == "groq":
-                return {
-                    "provider": "grok",
-                    "model": model_name,
-                    "api_base": api_base or "https://api.x.ai/v1/chat/completions",
-                    "api_key": api_key or "os.environ/GROK_API_KEY"
-                }
+            provider = _PREFIX_PROVIDERS.get(provider_prefix)
+            if provider == "claude" and "claude" not in model_name:
+                provider = None
         else:
             # Handle direct model names
-            if model_param.startswith("gpt-") or model_param.startswith("o"):
-                return {
-                    "provider": "openai",
-                    "model": model_param,
-                    "api_base": api_base or "https://api.openai.com/v1/chat/completions",
-                    "api_key": api_key or "os.environ/OPENAI_API_KEY"
-                }
-            elif model_param.startswith("claude-"):
-                return {
-                    "provider": "claude",
-                    "model": model_param,
-                    "api_base": api_base or "https://api.anthropic.com/v1/messages",
-                    "api_key": api_key or "os.environ/CLAUDE_API_KEY"
-                }
-            elif model_param.startswith("gemini-"):
-                return {
-                    "provider": "gemini",
-                    "model": model_param,
-                    "api_base": api_base or "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
-                    "api_key": api_key or "os.environ/GEMINI_API_KEY"
-                }
-            elif model_param.startswith("grok-"):
-                return {
-                    "provider": "grok",
-                    "model": model_param,
-                    "api_base": api_base or "https://api.x.ai/v1/chat/completions",
-                    "api_key": api_key or "os.environ/GROK_API_KEY"
-                }
+            model_name = model_param
+            provider = next(
+                (p for prefix, p in _BARE_MODEL_PREFIXES if model_param.startswith(prefix)),
+                None,
+            )
 
-        return None
+        if provider is None:
+            return None
 
-    def _extract_env_var(self, api_key_value: str) -> str:
+        default_base, default_key = _PROVIDER_DEFAULTS[provider]
+        return {
+            "provider": provider,
+            "model": model_name,
+            "api_base": litellm_params.get("api_base", "") or default_base,
+            "api_key": litellm_params.get("api_key", "") or default_key
+        }
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _extract_env_var(api_key_value: str) -> str:
         """Extract environment variable name from LiteLLM format"""
         if api_key_value.startswith("os.environ/"):
             return api_key_value.replace("os.environ/", "")
@@ -215,25 +293,26 @@ class BackendConfig:
             # but this is not recommended for security
             return "API_KEY"
 
-    def _infer_model_prefixes(self, models: List[str]) -> List[str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _infer_model_prefixes(models: Tuple[str, ...]) -> Tuple[str, ...]:
         """Infer model prefixes from model names"""
         prefixes = set()
         for model in models:
             # Extract prefix before first dash or number
-            match = re.match(r'^([a-zA-Z]+[-]?[a-zA-Z]*)', model)
+            match = _MODEL_PREFIX_RE.match(model)
             if match:
                 prefix = match.group(1)
                 if not prefix.endswith('-'):
                     prefix += '-'
                 prefixes.add(prefix)
-        return list(prefixes)
+        return tuple(prefixes)
 
     def reload(self):
-        """Reload configuration from file"""
-        self._config = None
-        return self.load_backends()
+        """Reload configuration from file if it changed since the last load"""
+        return self.load_backends(revalidate=True)
 
-    def get_config(self) -> Dict[str, Any]:
+    def get_config(self) -> Mapping[str, Any]:
         """Get current configuration"""
         return self.load_backends()
 
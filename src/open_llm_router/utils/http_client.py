@@ -0,0 +1,80 @@
+import asyncio
+import importlib.util
+import os
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+import httpx
+from .logger import proxy_logger
+
+# Shared upstream client, reused across requests so TCP/TLS connections stay pooled
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def build_limits() -> httpx.Limits:
+    """Connection pool limits for upstream LLM providers (overridable via env)"""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONN", "1000")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "500")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def build_timeout() -> httpx.Timeout:
+    """Per-phase upstream timeouts; read stays long for slow LLM completions"""
+    return httpx.Timeout(
+        connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+        read=float(os.getenv("LLM_READ_TIMEOUT", "120")),
+        write=float(os.getenv("LLM_WRITE_TIMEOUT", "30")),
+        pool=float(os.getenv("LLM_POOL_TIMEOUT", "5")),
+    )
+
+
+def http2_enabled() -> bool:
+    """Use HTTP/2 upstream unless disabled via env or the h2 package is missing"""
+    if os.getenv("LLM_HTTP2", "1") == "0":
+        return False
+    if importlib.util.find_spec("h2") is None:
+        proxy_logger.debug("h2 not installed; upstream client stays on HTTP/1.1")
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared upstream HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=http2_enabled(), limits=build_limits(), timeout=build_timeout()
+        )
+        proxy_logger.debug("Created shared upstream HTTP client")
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared upstream HTTP client and release pooled connections"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def prewarm_connections(urls: Iterable[str]):
+    """Open a pooled TLS connection to each upstream origin ahead of the first request"""
+    origins = set()
+    for url in urls:
+        parts = urlsplit(url or "")
+        if parts.scheme and parts.netloc:
+            origins.add(f"{parts.scheme}://{parts.netloc}")
+    if not origins:
+        return
+
+    client = get_http_client()
+    results = await asyncio.gather(
+        *(client.head(origin, timeout=5.0) for origin in origins),
+        return_exceptions=True,
+    )
+    for origin, result in zip(origins, results):
+        if isinstance(result, Exception):
+            proxy_logger.warning(f"Connection pre-warm failed for {origin}: {result}")
+        else:
+            proxy_logger.debug(f"Pre-warmed connection to {origin}")
@@ -10,20 +10,20 @@ logger = logging.getLogger("llm_router")
 
 
 class ProxyLogger:
+    __slots__ = ("logger", "info", "debug", "warning", "error")
+
     def __init__(self, name: str = "llm_router"):
         self.logger = logging.getLogger(name)
+        # Bind the logger's methods directly so each call skips a wrapper frame;
+        # pass %-style args so disabled levels skip message formatting
+        self.info = self.logger.info
+        self.debug = self.logger.debug
+        self.warning = self.logger.warning
+        self.error = self.logger.error
 
-    def info(self, message: str, **kwargs):
-        self.logger.info(message, **kwargs)
-
-    def debug(self, message: str, **kwargs):
-        self.logger.debug(message, **kwargs)
-
-    def warning(self, message: str, **kwargs):
-        self.logger.warning(message, **kwargs)
-
-    def error(self, message: str, **kwargs):
-        self.logger.error(message, **kwargs)
+    def debug_enabled(self) -> bool:
+        """Whether debug output is on; guard debug payloads that are costly to build"""
+        return self.logger.isEnabledFor(logging.DEBUG)
 
     def log_request(self, provider: str, model: str, url: str, stream: bool = False):
         """Log outgoing request to upstream provider"""
@@ -32,19 +32,18 @@ class ProxyLogger:
         )
 
     def log_response(
-        self, provider: str, status_code: int, duration_ms: float, model: str
+        self, provider: str, status_code: int, duration_ms: int, model: str
     ):
         """Log response from upstream provider with timing and status"""
-        duration_str = f"{duration_ms:.0f}ms"
         status_emoji = "✓" if 200 <= status_code < 300 else "✗"
         self.info(
-            f"← {provider.upper()}: {status_emoji} {status_code} in {duration_str} for {model}"
+            f"← {provider.upper()}: {status_emoji} {status_code} in {duration_ms}ms for {model}"
         )
 
     @contextmanager
     def time_request(self, provider: str, model: str, url: str, stream: bool = False):
         """Context manager to time and log requests"""
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
         self.log_request(provider, model, url, stream)
 
         try:
@@ -54,10 +53,10 @@ class ProxyLogger:
             pass
 
     def time_and_log_response(
-        self, provider: str, model: str, response: httpx.Response, start_time: float
+        self, provider: str, model: str, response: httpx.Response, start_ns: int
     ):
-        """Log response timing after receiving response"""
-        duration_ms = (time.time() - start_time) * 1000
+        """Log response timing; start_ns is a time.monotonic_ns() reading"""
+        duration_ms = (time.monotonic_ns() - start_ns) // 1_000_000
         self.log_response(provider, response.status_code, duration_ms, model)
 
 
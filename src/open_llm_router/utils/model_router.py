@@ -1,43 +1,160 @@
+import functools
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 from fastapi import HTTPException
 from .logger import proxy_logger
 
+# Placeholder keys used when a legacy API key variable is not set
+LEGACY_KEY_DEFAULTS = {
+    "OPENAI_API_KEY": "sk-xxxx",
+    "GROK_API_KEY": "gsk-xxxx",
+    "CLAUDE_API_KEY": "sk-ant-xxx",
+    "GEMINI_API_KEY": "AIza...",
+}
+PLACEHOLDER_KEY_PREFIXES = tuple(LEGACY_KEY_DEFAULTS.values())
+
 
 class ModelRouter:
-    def __init__(self, backends_config: Dict[str, Any]):
+    __slots__ = (
+        "backends_config",
+        "_backends",
+        "_model_aliases",
+        "_api_keys",
+        "_backend_cache",
+        "_model_index",
+        "_route_index",
+        "_prefix_index",
+        "resolved_aliases",
+        "_header_templates",
+        "_resolve_model",
+    )
+
+    def __init__(self, backends_config: Mapping[str, Any]):
         self.backends_config = backends_config
+        self._backends: Mapping[str, Any] = backends_config.get("backends", {})
+        self._model_aliases = backends_config.get("model_aliases", {})
+        self._api_keys: Dict[str, Tuple[Optional[str], str]] = {}
+        self._backend_cache: Dict[str, Dict[str, Any]] = {}
+        self._build_index()
+
+        # Per-instance memoization; a config reload builds a new router, which
+        # discards this along with the key/backend caches and lookup tables
+        self._resolve_model = functools.lru_cache(maxsize=1024)(
+            self._lookup_backend_name
+        )
+
+    def _build_index(self):
+        """Precompute model and prefix lookup tables from the backend configuration"""
+        self._model_index: Dict[str, str] = {}
+        prefix_index: List[Tuple[str, str]] = []
+
+        for backend_name, backend_config in self._backends.items():
+            for model in backend_config.get("models", []):
+                # First backend listing a model wins, as with the old linear scan
+                self._model_index.setdefault(model, backend_name)
+            for prefix in backend_config.get("model_prefixes", []):
+                prefix_index.append((prefix, backend_name))
+
+        # Longest prefix first so the most specific match wins; consecutive
+        # prefixes of the same backend are merged into one tuple so each run is
+        # a single str.startswith call
+        prefix_index.sort(key=lambda item: len(item[0]), reverse=True)
+        grouped: List[Tuple[List[str], str]] = []
+        for prefix, backend_name in prefix_index:
+            if grouped and grouped[-1][1] == backend_name:
+                grouped[-1][0].append(prefix)
+            else:
+                grouped.append(([prefix], backend_name))
+        self._prefix_index = tuple(
+            (tuple(prefixes), backend_name) for prefixes, backend_name in grouped
+        )
+
+        self.resolved_aliases = self._resolve_aliases()
+
+        # Exact names and routable aliases in one table, so the common case is a
+        # single probe; aliases shadow models of the same name, as before
+        self._route_index = {
+            model: backend_name
+            for model, backend_name in self._model_index.items()
+            if model not in self._model_aliases
+        }
+        for alias, (_, backend_name) in self.resolved_aliases.items():
+            self._route_index[alias] = backend_name
+
+        self._header_templates = {
+            backend_name: self._compile_headers_template(
+                backend_config.get(
+                    "headers_template", {"Authorization": "Bearer {api_key}"}
+                )
+            )
+            for backend_name, backend_config in self._backends.items()
+        }
+
+    @staticmethod
+    def _compile_headers_template(
+        headers_template: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Tuple[Tuple[str, Tuple[str, ...]], ...]]:
+        """Split a headers template into static headers and pre-split api key slots"""
+        static_headers = {}
+        key_headers = []
+        for key, value in headers_template.items():
+            if isinstance(value, str) and "{api_key}" in value:
+                key_headers.append((key, tuple(value.split("{api_key}"))))
+            else:
+                static_headers[key] = value
+        return static_headers, tuple(key_headers)
 
     def get_backend_for_model(self, model: str) -> str:
         """Determine which backend to use for a given model"""
-        # Check model aliases first
-        model_aliases = self.backends_config.get("model_aliases", {})
-        if model in model_aliases:
-            original_model = model
-            model = model_aliases[model]
-            proxy_logger.debug(f"Model alias resolved: {original_model} -> {model}")
-
-        # Check each backend's models
-        backends = self.backends_config.get("backends", {})
-        for backend_name, backend_config in backends.items():
-            models = backend_config.get("models", [])
-            if model in models:
-                proxy_logger.debug(f"Model {model} found in {backend_name} backend")
-                return backend_name
+        return self._resolve_model(model)
 
-        # Fallback to prefix-based matching for backward compatibility
-        for backend_name, backend_config in backends.items():
-            model_prefixes = backend_config.get("model_prefixes", [])
-            for prefix in model_prefixes:
-                if model.startswith(prefix):
-                    proxy_logger.debug(
-                        f"Model {model} matched prefix {prefix} for {backend_name}"
-                    )
-                    return backend_name
+    def _lookup_backend_name(self, model: str) -> str:
+        """Resolve a model name (or alias) to a backend name without caching"""
+        backend_name = self._route_index.get(model)
+        if backend_name is not None:
+            proxy_logger.debug("Model %s routed to %s backend", model, backend_name)
+            return backend_name
+
+        # Check model aliases first (a single probe; non-aliases map to themselves)
+        resolved = self._model_aliases.get(model, model)
+        if resolved is not model:
+            proxy_logger.debug("Model alias resolved: %s -> %s", model, resolved)
+            model = resolved
+
+        backend_name = self._match_backend(model)
+        if backend_name is not None:
+            proxy_logger.debug("Model %s routed to %s backend", model, backend_name)
+            return backend_name
 
         proxy_logger.error(f"Unknown model requested: {model}")
         raise HTTPException(400, f"Unknown model: {model}")
 
+    def _match_backend(self, model: str) -> Optional[str]:
+        """Match a concrete model name by exact name, then longest prefix"""
+        # Exact model match
+        backend_name = self._model_index.get(model)
+        if backend_name is not None:
+            return backend_name
+
+        # Fallback to prefix-based matching for backward compatibility
+        for prefixes, backend_name in self._prefix_index:
+            if model.startswith(prefixes):
+                return backend_name
+        return None
+
+    def _resolve_aliases(self) -> Dict[str, Tuple[str, str]]:
+        """Map each alias to (target model, backend), reporting unroutable aliases"""
+        resolved = {}
+        for alias, target in self._model_aliases.items():
+            backend_name = self._match_backend(self._model_aliases.get(target, target))
+            if backend_name is None:
+                proxy_logger.warning(
+                    f"Model alias {alias} -> {target} does not match any backend"
+                )
+                continue
+            resolved[alias] = (target, backend_name)
+        return resolved
+
     def get_api_key_for_backend(
         self, backend_name: str, backend_config: Dict[str, Any]
     ) -> str:
@@ -48,54 +165,63 @@ class ModelRouter:
                 500, f"No API key environment variable configured for {backend_name}"
             )
 
-        api_key = os.getenv(api_key_env)
+        # Only the environment read happens per request; fallback resolution and
+        # logging rerun only when the variable's value changes
+        env_value = os.getenv(api_key_env)
+        cached = self._api_keys.get(backend_name)
+        if cached is not None and cached[0] == env_value:
+            return cached[1]
+
+        api_key = env_value
         if not api_key:
             # Fallback to legacy environment variables
-            legacy_keys = {
-                "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-xxxx"),
-                "GROK_API_KEY": os.getenv("GROK_API_KEY", "gsk-xxxx"),
-                "CLAUDE_API_KEY": os.getenv("CLAUDE_API_KEY", "sk-ant-xxx"),
-                "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "AIza..."),
-            }
-            api_key = legacy_keys.get(api_key_env, f"default-{backend_name}-key")
+            if api_key_env in LEGACY_KEY_DEFAULTS:
+                api_key = os.getenv(api_key_env, LEGACY_KEY_DEFAULTS[api_key_env])
+            else:
+                api_key = f"default-{backend_name}-key"
 
         # Log API key status without exposing the key
-        has_valid_key = api_key and not any(
-            api_key.startswith(default)
-            for default in ["sk-xxxx", "gsk-xxxx", "sk-ant-xxx", "AIza..."]
+        has_valid_key = bool(api_key) and not api_key.startswith(
+            PLACEHOLDER_KEY_PREFIXES
+        )
+        proxy_logger.debug(
+            "%s loaded: %s", api_key_env, "Yes" if has_valid_key else "No"
         )
-        proxy_logger.debug(f"{api_key_env} loaded: {'Yes' if has_valid_key else 'No'}")
 
+        self._api_keys[backend_name] = (env_value, api_key)
         return api_key
 
     def choose_backend(self, model: str) -> Dict[str, Any]:
         """Choose the appropriate backend for the given model"""
         backend_name = self.get_backend_for_model(model)
-        backends = self.backends_config.get("backends", {})
-
-        if backend_name not in backends:
+        backend_config = self._backends.get(backend_name)
+        if backend_config is None:
             raise HTTPException(
                 400, f"Backend {backend_name} not found in configuration"
             )
 
-        backend_config = backends[backend_name]
         api_key = self.get_api_key_for_backend(backend_name, backend_config)
 
-        # Build headers from template
-        headers_template = backend_config.get(
-            "headers_template", {"Authorization": "Bearer {api_key}"}
-        )
-        headers = {}
-        for key, value in headers_template.items():
-            if isinstance(value, str) and "{api_key}" in value:
-                headers[key] = value.format(api_key=api_key)
-            else:
-                headers[key] = value
+        # The resolved backend is shared between requests (callers treat it as
+        # read-only) and rebuilt only when the backend's API key changes
+        cached = self._backend_cache.get(backend_name)
+        if cached is not None and cached["api_key"] == api_key:
+            return cached
 
-        return {
+        backend = {
             "base_url": backend_config["base_url"],
             "api_key": api_key,
-            "headers": headers,
+            "headers": self._build_headers(backend_name, api_key),
             "backend_name": backend_name,
             "config": backend_config,
         }
+        self._backend_cache[backend_name] = backend
+        return backend
+
+    def _build_headers(self, backend_name: str, api_key: str) -> Dict[str, Any]:
+        """Build request headers for a backend from its compiled headers template"""
+        static_headers, key_headers = self._header_templates[backend_name]
+        headers = dict(static_headers)
+        for key, parts in key_headers:
+            headers[key] = api_key.join(parts)
+        return headers
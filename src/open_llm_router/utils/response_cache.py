@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTasks
+from .logger import proxy_logger
+
+CacheKey = Tuple[str, bytes]
+
+# Stream generators report upstream failures in-band, as an error event
+# followed by [DONE]; such streams are still relayed but never cached
+STREAM_ERROR_EVENT = b'data: {"error"'
+
+
+class StreamBroadcast:
+    """Fan one upstream stream out to every client that asks for the same request
+
+    Chunks are kept for the life of the stream so late subscribers replay them
+    from the start before following live ones.
+    """
+
+    __slots__ = ("chunks", "done", "media_type", "headers", "task", "_changed")
+
+    def __init__(self, media_type: str, headers: Dict[str, str]):
+        self.chunks = []
+        self.done = False
+        self.media_type = media_type
+        self.headers = headers
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self):
+        self.done = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    def response(self) -> StreamingResponse:
+        return StreamingResponse(
+            self.subscribe(), media_type=self.media_type, headers=self.headers
+        )
+
+
+class ResponseCache:
+    """Short-lived in-process LRU of successful completion bodies
+
+    Identical requests that arrive while one is already in flight wait for it
+    and are answered from its cached body instead of calling the backend again.
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, ttl: float = 60.0, inflight_timeout: float = 120.0
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.inflight_timeout = inflight_timeout
+        self._entries: "OrderedDict[CacheKey, Tuple[float, bytes, str]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._streams: Dict[CacheKey, StreamBroadcast] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def make_key(model: str, body_bytes: bytes) -> CacheKey:
+        """Key on the model plus a digest of the exact request body"""
+        return model, hashlib.blake2b(body_bytes, digest_size=16).digest()
+
+    @staticmethod
+    def is_cacheable(body: Dict[str, Any]) -> bool:
+        """Only deterministic, non-streaming requests may be answered from cache"""
+        if body.get("stream", False):
+            return False
+        return body.get("seed") is not None or body.get("temperature") == 0
+
+    @staticmethod
+    def is_replayable(body: Dict[str, Any]) -> bool:
+        """Deterministic streaming requests may share or replay one upstream stream"""
+        if not body.get("stream", False):
+            return False
+        return body.get("seed") is not None or body.get("temperature") == 0
+
+    def get(self, key: CacheKey) -> Optional[Response]:
+        """Return a fresh response for a live entry, or None on miss/expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, content, media_type = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        proxy_logger.debug("Response cache hit for model %s", key[0])
+        return Response(content=content, media_type=media_type)
+
+    async def get_or_wait(self, key: CacheKey) -> Optional[Response]:
+        """Return a cached response, first waiting on an identical in-flight request
+
+        On a miss with nothing in flight the caller becomes the leader for
+        ``key`` and must pass its outcome to capture() or release().
+        """
+        response = self.get(key)
+        if response is not None:
+            return response
+
+        pending = self._inflight.get(key)
+        if pending is None or pending.get_loop() is not asyncio.get_running_loop():
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+            return None
+
+        try:
+            await asyncio.wait_for(asyncio.shield(pending), self.inflight_timeout)
+        except asyncio.TimeoutError:
+            # The leader is still waiting on its backend; stop waiting for it
+            if self._inflight.get(key) is pending:
+                del self._inflight[key]
+            return None
+        # None if the leader failed; this request then goes upstream on its own
+        return self.get(key)
+
+    def replay(self, key: CacheKey) -> Optional[Response]:
+        """Answer a streaming request from a finished or still-running identical stream"""
+        response = self.get(key)
+        if response is not None:
+            return response
+        broadcast = self._streams.get(key)
+        if (
+            broadcast is None
+            or broadcast.task.get_loop() is not asyncio.get_running_loop()
+        ):
+            return None
+        proxy_logger.debug("Joining in-flight stream for model %s", key[0])
+        return broadcast.response()
+
+    def broadcast(self, key: CacheKey, response: Any) -> Any:
+        """Move a successful streaming response onto a shared producer task
+
+        The returned response is the first subscriber; later identical requests
+        subscribe through replay() until the stream ends and is cached.
+        """
+        if not isinstance(response, StreamingResponse) or response.status_code != 200:
+            return response
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name != "content-length"
+        }
+        broadcast = StreamBroadcast(response.media_type or "text/event-stream", headers)
+        broadcast.task = asyncio.get_running_loop().create_task(
+            self._produce(key, response.body_iterator, broadcast)
+        )
+        self._streams[key] = broadcast
+        return broadcast.response()
+
+    async def _produce(
+        self,
+        key: CacheKey,
+        body_iterator: AsyncIterator[Any],
+        broadcast: StreamBroadcast,
+    ):
+        # Runs apart from any one client, so a disconnect does not cut the
+        # stream short for the other subscribers
+        try:
+            failed = False
+            async for chunk in body_iterator:
+                if not isinstance(chunk, bytes):
+                    chunk = chunk.encode()
+                failed = failed or chunk.startswith(STREAM_ERROR_EVENT)
+                broadcast.push(chunk)
+            if failed:
+                proxy_logger.warning(
+                    "Shared stream for model %s ended with an error; not cached",
+                    key[0],
+                )
+            else:
+                self.set(key, b"".join(broadcast.chunks), broadcast.media_type)
+        except Exception as e:
+            proxy_logger.error(f"Shared stream for model {key[0]} failed: {e}")
+        finally:
+            broadcast.close()
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+
+    def release(self, key: CacheKey):
+        """Wake requests waiting on ``key`` once its leader has finished"""
+        pending = self._inflight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_result(None)
+
+    def set(self, key: CacheKey, content: bytes, media_type: str):
+        self._entries[key] = (time.monotonic() + self.ttl, content, media_type)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def capture(self, key: CacheKey, response: Any) -> Any:
+        """Store a successful provider response's body and return it for sending
+
+        Waiters on ``key`` are released once the body is stored, or right away
+        if the response cannot be cached.
+        """
+        if not isinstance(response, Response) or response.status_code != 200:
+            self.release(key)
+            return response
+        media_type = response.media_type or "application/json"
+
+        if isinstance(response, StreamingResponse):
+            # Relayed bodies are only known once sent; store them after the last chunk
+            response.body_iterator = self._tee(key, response.body_iterator, media_type)
+            # Waiters are also released after sending, in case the body is never
+            # iterated (e.g. the client disconnected first)
+            tasks = BackgroundTasks()
+            if response.background is not None:
+                tasks.add_task(response.background)
+            tasks.add_task(self._release_after_send, key)
+            response.background = tasks
+        else:
+            self.set(key, bytes(response.body), media_type)
+            self.release(key)
+        return response
+
+    async def _release_after_send(self, key: CacheKey):
+        # A coroutine, so Starlette calls it on the event loop that owns the future
+        self.release(key)
+
+    async def _tee(
+        self, key: CacheKey, body_iterator: AsyncIterator[Any], media_type: str
+    ) -> AsyncIterator[Any]:
+        chunks = []
+        try:
+            async for chunk in body_iterator:
+                chunks.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+                yield chunk
+            self.set(key, b"".join(chunks), media_type)
+        finally:
+            self.release(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._streams.clear()
+        for key in list(self._inflight):
+            self.release(key)
+
+
+# Global cache instance; off unless LLM_CACHE_TTL is set to a positive value
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "0")),
+)
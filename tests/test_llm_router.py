@@ -8,6 +8,7 @@ import json
 import yaml
 import os
 import importlib
+import tempfile
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 
@@ -15,6 +16,10 @@ from fastapi.testclient import TestClient
 import sys
 
 sys.path.insert(0, "..")
+# Keep the converted-config cache out of the developer's ~/.cache
+os.environ.setdefault(
+    "OPEN_LLM_ROUTER_CACHE_DIR", tempfile.mkdtemp(prefix="open_llm_router-test-")
+)
 from src.open_llm_router.llm_router import app  # noqa: E402
 
 
@@ -280,6 +285,511 @@ class TestLLMRouter:
             assert "backend" in model
             assert model["object"] == "model"
 
+    @pytest.mark.parametrize(
+        "body",
+        [
+            [{"model": "gpt-4o"}],
+            {"model": "gpt-4o", "messages": "hello"},
+            {"model": ["gpt-4o"], "messages": [{"role": "user", "content": "hi"}]},
+        ],
+    )
+    def test_chat_completions_rejects_malformed_body(self, body):
+        """Test that wrongly typed request bodies are rejected with 400, not 500"""
+        response = self.client.post("/v1/chat/completions", json=body)
+        assert response.status_code == 400
+
+    def test_batch_endpoint_validation(self):
+        """Test that the batch endpoint rejects bad bodies and reports per-entry errors"""
+        response = self.client.post("/v1/chat/completions/batch", json={"a": 1})
+        assert response.status_code == 400
+
+        response = self.client.post(
+            "/v1/chat/completions/batch",
+            json=[{"model": "gpt-4o", "messages": []}, "not-a-request"],
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 2
+        assert all(result["error"]["code"] == 400 for result in results)
+
+    @pytest.mark.parametrize("path", ["/v1/models", "/admin/config", "/admin/backends"])
+    def test_etag_not_modified(self, path):
+        """Test that cached endpoints return 304 for a matching If-None-Match"""
+        response = self.client.get(path)
+        assert response.status_code == 200
+        etag = response.headers.get("etag")
+        assert etag
+
+        response = self.client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers.get("etag") == etag
+
+        response = self.client.get(path, headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+
+
+class TestBackendConfig:
+    """Unit tests for loading and caching the LiteLLM config file"""
+
+    def test_config_with_non_string_keys_loads(self, tmp_path, monkeypatch):
+        from src.open_llm_router.utils import config
+
+        config_file = tmp_path / "config.yml"
+        config_file.write_text(
+            "model_list:\n"
+            "  - model_name: 2024\n"
+            "    litellm_params:\n"
+            "      model: openai/gpt-4o\n"
+            "      api_key: os.environ/OPENAI_API_KEY\n"
+        )
+        monkeypatch.setenv("OPEN_LLM_ROUTER_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(config, "_CONFIG_CANDIDATES", ((config_file, "yaml"),))
+
+        # The converted config cannot be cached as JSON; loading still works
+        loaded = config.BackendConfig().load_backends()
+        assert loaded["model_aliases"] == {2024: "gpt-4o"}
+        assert "gpt-4o" in loaded["backends"]["openai"]["models"]
+
+
+class TestModelRouter:
+    """Unit tests for ModelRouter lookup tables"""
+
+    def setup_method(self):
+        from src.open_llm_router.utils.model_router import ModelRouter
+
+        self.router = ModelRouter(
+            {
+                "backends": {
+                    "openai": {
+                        "base_url": "https://api.openai.com/v1/chat/completions",
+                        "api_key_env": "OPENAI_API_KEY",
+                        "models": ["gpt-4o", "shared-model"],
+                        "model_prefixes": ["gpt-"],
+                    },
+                    "azure": {
+                        "base_url": "https://example.azure.com/v1/chat/completions",
+                        "api_key_env": "AZURE_API_KEY",
+                        "models": ["shared-model"],
+                        "model_prefixes": ["gpt-4o-azure-"],
+                    },
+                },
+                "model_aliases": {"fast": "gpt-4o", "broken": "no-such-model"},
+            }
+        )
+
+    def test_exact_match_prefers_first_backend(self):
+        assert self.router.get_backend_for_model("shared-model") == "openai"
+
+    def test_alias_resolution(self):
+        assert self.router.get_backend_for_model("fast") == "openai"
+
+    def test_resolved_aliases_skip_unroutable_targets(self):
+        assert self.router.resolved_aliases == {"fast": ("gpt-4o", "openai")}
+
+    def test_longest_prefix_wins(self):
+        assert self.router.get_backend_for_model("gpt-4o-azure-eu") == "azure"
+        assert self.router.get_backend_for_model("gpt-5") == "openai"
+
+
+class TestStreamResponse:
+    """Unit tests for SSE relaying in BaseProvider.stream_response"""
+
+    def _collect(self, chunks):
+        import asyncio
+        import httpx
+        from src.open_llm_router.providers.base import BaseProvider
+
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        async def run():
+            provider = BaseProvider({"backend_name": "openai"})
+            response = httpx.Response(200, content=body())
+            return b"".join([c async for c in provider.stream_response(response)])
+
+        return asyncio.run(run())
+
+    def test_events_split_across_chunks(self):
+        output = self._collect(
+            [
+                b'data: {"choices": [{"del',
+                b'ta": {}}]}\r\n\r\ndata: [DO',
+                b"NE]\r\n\r\n",
+            ]
+        )
+        assert output == b'data: {"choices": [{"delta": {}}]}\n\ndata: [DONE]\n\n'
+
+    def test_openai_chunks_are_relayed_verbatim(self):
+        event = b'data: {"id":"1","choices" : [{"delta":{"content":"\\"choices\\""}}]}'
+        output = self._collect([event + b"\n\n"])
+        assert output == event + b"\n\ndata: [DONE]\n\n"
+
+    def test_non_openai_chunks_are_reshaped(self):
+        output = self._collect([b'data: {"delta": {"content": "hi"}}\n\n'])
+        frame = json.loads(output.split(b"\n\n")[0][len(b"data: ") :])
+        assert frame["object"] == "chat.completion.chunk"
+        assert frame["choices"][0]["delta"] == {"content": "hi"}
+        assert output.endswith(b"data: [DONE]\n\n")
+
+    def test_content_chunk_frame_matches_sse_event(self):
+        import orjson
+        from src.open_llm_router.providers.base import content_chunk_frame, sse_event
+
+        text = 'Hi "there"\né'
+        prefix, suffix = content_chunk_frame("chatcmpl-1", 123, 'model-"x"')
+        expected = sse_event(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion.chunk",
+                "created": 123,
+                "model": 'model-"x"',
+                "choices": [
+                    {"index": 0, "delta": {"content": text}, "finish_reason": None}
+                ],
+            }
+        )
+        assert prefix + orjson.dumps(text) + suffix == expected
+
+
+class TestClaudeStreamResponse:
+    """Unit tests for converting Anthropic SSE events to OpenAI chunks"""
+
+    def test_events_split_across_chunks(self):
+        import asyncio
+        import httpx
+        from src.open_llm_router.providers.claude import ClaudeProvider
+
+        chunks = [
+            b'event: content_block_delta\ndata: {"type": "content_block_delta", "del',
+            b'ta": {"text": "Hi"}}\n\nevent: message_stop\n',
+            b'data: {"type": "message_stop"}\n\n',
+        ]
+
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        async def run():
+            provider = ClaudeProvider({"backend_name": "claude", "api_key": "k"})
+            response = httpx.Response(200, content=body())
+            stream = provider.claude_stream_response(response, "claude-x", "chatcmpl-1")
+            return [frame async for frame in stream]
+
+        frames = asyncio.run(run())
+        assert len(frames) == 3
+        first, last = (json.loads(frame[len(b"data: ") :]) for frame in frames[:2])
+        assert first["choices"][0]["delta"] == {"content": "Hi"}
+        assert last["choices"][0]["finish_reason"] == "stop"
+        assert frames[2] == b"data: [DONE]\n\n"
+
+
+class TestGeminiStreamResponse:
+    """Unit tests for converting Gemini SSE events to OpenAI chunks"""
+
+    def _collect(self, chunks):
+        import asyncio
+        import httpx
+        from src.open_llm_router.providers.gemini import GeminiProvider
+
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        async def run():
+            provider = GeminiProvider({"backend_name": "gemini", "api_key": "k"}, {})
+            response = httpx.Response(200, content=body())
+            stream = provider.gemini_stream_response(response, "gemini-x", "chatcmpl-1")
+            return [frame async for frame in stream]
+
+        return asyncio.run(run())
+
+    def test_events_split_across_chunks(self):
+        frames = self._collect(
+            [
+                b'data: {"candidates": [{"content": {"parts": [{"text": "Hel',
+                b'lo"}]}}]}\r\n\r\ndata: {"candidates": [{"content": {"parts": ',
+                b'[{"text": " world"}]}, "finishReason": "MAX_TOKENS"}]}\r\n\r\n',
+            ]
+        )
+        assert len(frames) == 4
+        deltas = [json.loads(frame[len(b"data: ") :]) for frame in frames[:3]]
+        assert deltas[0]["choices"][0]["delta"] == {"content": "Hello"}
+        assert deltas[1]["choices"][0]["delta"] == {"content": " world"}
+        assert deltas[2]["choices"][0]["finish_reason"] == "length"
+        assert frames[3] == b"data: [DONE]\n\n"
+
+    def test_repeated_text_is_not_dropped(self):
+        frames = self._collect(
+            [
+                b'data: {"candidates": [{"content": {"parts": [{"text": "Ha"}]}}]}\n\n',
+                b'data: {"candidates": [{"content": {"parts": [{"text": "Ha!"}]}}]}\n\n',
+            ]
+        )
+        deltas = [json.loads(frame[len(b"data: ") :]) for frame in frames[:2]]
+        text = "".join(d["choices"][0]["delta"]["content"] for d in deltas)
+        assert text == "HaHa!"
+        assert frames[2] == b"data: [DONE]\n\n"
+
+
+class TestResponseCache:
+    """Unit tests for the short-lived completion response cache"""
+
+    def setup_method(self):
+        from src.open_llm_router.utils.response_cache import ResponseCache
+
+        self.cache = ResponseCache(maxsize=2, ttl=60)
+
+    def test_only_deterministic_requests_are_cacheable(self):
+        assert self.cache.is_cacheable({"temperature": 0})
+        assert self.cache.is_cacheable({"temperature": 0.7, "seed": 1})
+        assert not self.cache.is_cacheable({})
+        assert not self.cache.is_cacheable({"temperature": 0.7})
+        assert not self.cache.is_cacheable({"temperature": 0, "stream": True})
+
+    def test_hit_returns_stored_body(self):
+        key = self.cache.make_key("gpt-4o", b'{"temperature":0}')
+        assert self.cache.get(key) is None
+        self.cache.set(key, b'{"id":"x"}', "application/json")
+        assert self.cache.get(key).body == b'{"id":"x"}'
+
+    def test_expired_and_evicted_entries_miss(self):
+        keys = [self.cache.make_key("gpt-4o", bytes([i])) for i in range(3)]
+        for key in keys:
+            self.cache.set(key, b"{}", "application/json")
+        assert self.cache.get(keys[0]) is None
+        assert self.cache.get(keys[2]) is not None
+
+        self.cache.ttl = 0
+        self.cache.set(keys[1], b"{}", "application/json")
+        assert self.cache.get(keys[1]) is None
+
+    def test_concurrent_duplicates_wait_for_leader(self):
+        import asyncio
+        from fastapi.responses import Response
+
+        key = self.cache.make_key("gpt-4o", b'{"temperature":0}')
+
+        async def run():
+            assert await self.cache.get_or_wait(key) is None  # leader
+            follower = asyncio.create_task(self.cache.get_or_wait(key))
+            await asyncio.sleep(0)
+            assert not follower.done()
+            self.cache.capture(key, Response(content=b'{"id":"x"}'))
+            return await follower
+
+        assert asyncio.run(run()).body == b'{"id":"x"}'
+
+    def test_failed_leader_releases_waiters(self):
+        import asyncio
+
+        key = self.cache.make_key("gpt-4o", b'{"temperature":0}')
+
+        async def run():
+            assert await self.cache.get_or_wait(key) is None
+            follower = asyncio.create_task(self.cache.get_or_wait(key))
+            await asyncio.sleep(0)
+            self.cache.release(key)
+            return await follower
+
+        assert asyncio.run(run()) is None
+        assert not self.cache._inflight
+
+    def test_unsent_relayed_body_releases_waiters(self):
+        import asyncio
+        from fastapi.responses import StreamingResponse
+
+        key = self.cache.make_key("gpt-4o", b'{"temperature":0}')
+
+        async def body():
+            yield b"{}"
+
+        async def run():
+            assert await self.cache.get_or_wait(key) is None
+            follower = asyncio.create_task(self.cache.get_or_wait(key))
+            await asyncio.sleep(0)
+            response = self.cache.capture(key, StreamingResponse(body()))
+            # The client went away before the body was iterated
+            await response.background()
+            return await asyncio.wait_for(follower, 1)
+
+        assert asyncio.run(run()) is None
+        assert not self.cache._inflight
+        assert self.cache.get(key) is None
+
+    def test_streams_are_shared_and_replayed(self):
+        import asyncio
+        from fastapi.responses import StreamingResponse
+
+        key = self.cache.make_key("gpt-4o", b'{"stream":true,"temperature":0}')
+        assert self.cache.is_replayable({"stream": True, "temperature": 0})
+        assert not self.cache.is_replayable({"stream": True})
+
+        async def upstream():
+            for chunk in (b"data: 1\n\n", b"data: 2\n\n", b"data: [DONE]\n\n"):
+                await asyncio.sleep(0)
+                yield chunk
+
+        async def read(response):
+            return b"".join([chunk async for chunk in response.body_iterator])
+
+        async def run():
+            assert self.cache.replay(key) is None
+            leader = self.cache.broadcast(
+                key, StreamingResponse(upstream(), media_type="text/event-stream")
+            )
+            await asyncio.sleep(0)
+            follower = self.cache.replay(key)
+            return await asyncio.gather(read(leader), read(follower))
+
+        leader_body, follower_body = asyncio.run(run())
+        assert leader_body == follower_body == b"data: 1\n\ndata: 2\n\ndata: [DONE]\n\n"
+        assert self.cache.get(key).body == leader_body
+
+    def test_failed_streams_are_not_cached(self):
+        import asyncio
+        import httpx
+        from fastapi.responses import StreamingResponse
+        from src.open_llm_router.providers.base import BaseProvider
+
+        key = self.cache.make_key("gpt-4o", b'{"stream":true,"temperature":0}')
+
+        async def upstream():
+            yield b'data: {"choices": [{"delta": {"content": "Hi"}}]}\n\n'
+            raise httpx.ReadError("connection reset")
+
+        async def run():
+            provider = BaseProvider({"backend_name": "openai"})
+            response = httpx.Response(200, content=upstream())
+            body = StreamingResponse(
+                provider.stream_response(response), media_type="text/event-stream"
+            )
+            leader = self.cache.broadcast(key, body)
+            return b"".join([chunk async for chunk in leader.body_iterator])
+
+        output = asyncio.run(run())
+        assert b'"stream_error"' in output
+        assert self.cache.get(key) is None
+        assert self.cache.replay(key) is None
+
+
+class TestBackendGuard:
+    """Unit tests for per-backend concurrency limits and the circuit breaker"""
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        import asyncio
+        from fastapi import HTTPException
+        from src.open_llm_router.utils.backend_guard import BackendGuard
+
+        guard = BackendGuard("claude", max_parallel=2, max_failures=2, cooldown=60)
+
+        async def call(exc):
+            async with guard:
+                raise exc
+
+        async def run():
+            for exc in (HTTPException(502), HTTPException(400), HTTPException(504)):
+                with pytest.raises(HTTPException):
+                    await call(exc)
+            assert not guard.is_open  # the 400 reset the failure count
+            with pytest.raises(HTTPException):
+                await call(HTTPException(504))
+            assert guard.is_open
+            with pytest.raises(HTTPException) as excinfo:
+                await call(RuntimeError("not reached"))
+            assert excinfo.value.status_code == 503
+            assert guard.semaphore._value == 2
+
+        asyncio.run(run())
+
+        guard.cooldown = 0
+        assert not guard.is_open
+
+    def test_error_responses_count_as_failures(self):
+        import asyncio
+        from fastapi.responses import Response
+        from src.open_llm_router.utils.backend_guard import BackendGuard
+
+        guard = BackendGuard("gemini", max_parallel=1, max_failures=2, cooldown=60)
+
+        async def call(status_code):
+            await guard.acquire()
+            return guard.release_after(Response(status_code=status_code))
+
+        async def run():
+            await call(500)
+            await call(200)
+            assert guard.failures == 0
+            await call(500)
+            await call(500)
+            assert guard.is_open
+            assert guard.semaphore._value == 1
+
+        asyncio.run(run())
+
+    def test_streaming_response_holds_slot_until_sent(self):
+        import asyncio
+        from fastapi.responses import StreamingResponse
+        from src.open_llm_router.utils.backend_guard import BackendGuard
+
+        guard = BackendGuard("claude", max_parallel=1)
+
+        async def body():
+            yield b"data: [DONE]\n\n"
+
+        async def run():
+            await guard.acquire()
+            response = guard.release_after(StreamingResponse(body()))
+            assert guard.semaphore.locked()
+            assert [chunk async for chunk in response.body_iterator]
+            assert not guard.semaphore.locked()
+            await response.background()  # releasing twice is a no-op
+            assert guard.semaphore._value == 1
+
+        asyncio.run(run())
+
+    def test_upstream_client_errors_do_not_open_circuit(self):
+        import asyncio
+        import httpx
+        from fastapi import HTTPException
+        from src.open_llm_router import llm_router
+        from src.open_llm_router.utils import http_client
+        from src.open_llm_router.utils.backend_guard import (
+            get_backend_guard,
+            reset_backend_guards,
+        )
+        from src.open_llm_router.utils.model_router import ModelRouter
+
+        backend = {
+            "base_url": "http://claude.test/v1/messages",
+            "api_key": "k",
+            "headers": {},
+            "backend_name": "claude",
+            "config": {},
+        }
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(400, json={"error": {"message": "bad"}})
+        )
+        body = {"model": "claude-x", "messages": [{"role": "user", "content": "hi"}]}
+
+        async def run():
+            client = httpx.AsyncClient(transport=transport)
+            with patch.object(http_client, "_http_client", client), patch.object(
+                ModelRouter, "choose_backend", return_value=backend
+            ):
+                for _ in range(6):
+                    with pytest.raises(HTTPException) as excinfo:
+                        await llm_router.dispatch_chat_completion(body, b"{}")
+                    assert excinfo.value.status_code == 400
+            await client.aclose()
+
+        reset_backend_guards()
+        try:
+            asyncio.run(run())
+            assert get_backend_guard(backend).failures == 0
+        finally:
+            reset_backend_guards()
+
 
 class TestLLMRouterIntegration:
     """Integration tests for LLM Router with external APIs"""